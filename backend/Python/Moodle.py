@@ -1,69 +1,59 @@
+import os, json, asyncio, argparse
+from dotenv import load_dotenv
 
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
+# Load .env from backend directory, before browser_pool and session_cache read it
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
-def moodle_login():
-    service = Service("C:/Program Files (x86)/chromedriver-win64/chromedriver.exe")
+from browser_pool import run_task
+import session_cache
 
-    options = Options()
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option("detach", True)  # Keep Chrome open after script ends
-    options.add_argument("--start-maximized")        # Maximize window
-    # options.add_argument("--headless")             # <-- REMOVE headless if present
+LOGIN_URL = "https://moodle.manit.ac.in/login/index.php"
+DASHBOARD_URL = "https://moodle.manit.ac.in/my/"
 
-    chrome = webdriver.Chrome(service=service, options=options)
-    chrome.get('https://moodle.manit.ac.in/login/index.php')
-
-    username = chrome.find_element(By.ID, 'username')
-    username.send_keys("2311201281")
-    password = chrome.find_element(By.ID, 'password')
-    password.send_keys("MoHIt0208@")
-    submit = chrome.find_element(By.ID, 'loginbtn')
-    submit.click()
-
-    input("Quit")
-
-if __name__ == "__main__":
-    moodle_login()
 
+async def moodle_login(page, username=None, password=None, wait_for_quit=False, fresh=False):
+    username = username or os.getenv("MOODLE_USERNAME")
+    password = password or os.getenv("MOODLE_PASSWORD")
+    if not username or not password:
+        return {"error": "Missing MOODLE_USERNAME or MOODLE_PASSWORD in .env"}
 
+    result = None
+    if session_cache.restored(page.context):
+        # the dashboard bounces to the login page once the session has expired
+        await page.goto(DASHBOARD_URL, wait_until="domcontentloaded")
+        if "/login/" not in page.url:
+            result = {"logged_in": True, "url": page.url, "session": "cached"}
 
+    if result is None:
+        if not page.url.startswith(LOGIN_URL):
+            await page.goto(LOGIN_URL, wait_until="domcontentloaded")
+        await page.fill("#username", username)
+        await page.fill("#password", password)
+        await page.click("#loginbtn")
 
+        # done when we either leave the login page or it shows its error
+        await page.wait_for_selector("#loginerrormessage, body:not(#page-login-index)")
+        result = {"logged_in": "/login/" not in page.url, "url": page.url, "session": "new"}
+        if result["logged_in"]:
+            await session_cache.remember(page.context)
+        else:
+            session_cache.forget(page.context)
+    if wait_for_quit:
+        await asyncio.to_thread(input, "Quit")
+    return result
 
 
-# from playwright.sync_api import sync_playwright
+def moodle_session(username=None, fresh=False, **params):
+    return None if fresh else ("moodle", username or os.getenv("MOODLE_USERNAME"))
 
 
-# def moodle_login():
-#     p=sync_playwright()
-#     browser = p.chromium.launch(headless=False)   # headless=True for no UI
-#     context = browser.new_context()                # like a clean profile
-#     page = context.new_page()
+moodle_login.session = moodle_session
 
-#     page.goto("https://moodle.manit.ac.in/login/index.php")
 
-
-#     try:
-#         page.fill('#username', "2311201281")
-#     except Exception:
-#         print("error")
-#         # sometimes the prompt might be a div[contenteditable] or different selector
-#         # try:
-#         #     page.fill("input[tag='textarea']", search)
-#         # except Exception:
-#         #     # last resort: use locator and type
-#         #     locator = page.locator("textarea[name='prompt-textarea'], input[name='prompt-textarea'], [contenteditable='true']")
-#         #     locator.first.fill(search)
-#     page.fill('#password', "MoHIt0208@")
-#     # Click submit
-
-#     try:
-#         page.click("#loginbtn")
-#     except Exception:
-#         print("⚠️ Couldn't find submit button")
-
-#     # keep browser open a bit so you can see results
-#     input("Quit: ")
-    
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Log in to Moodle")
+    parser.add_argument("--headed", action="store_true", help="show the browser and keep it open until Enter")
+    parser.add_argument("--fast", action="store_true", help="block images, media, fonts and trackers")
+    parser.add_argument("--fresh", action="store_true", help="ignore the saved session and log in again")
+    args = parser.parse_args()
+    print(json.dumps(run_task(moodle_login, headless=not args.headed, fast=args.fast, wait_for_quit=args.headed, fresh=args.fresh)))
@@ -0,0 +1,210 @@
+import os, sys, json, time, asyncio, argparse, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from bench_common import add_output_arguments, change, percentile, report
+
+# Per-task latency of the page-automation flow against a local stand-in
+# site, in three modes:
+#
+#   legacy  full "load" navigation and a fixed wait, as the scripts used to
+#   waits   domcontentloaded + waiting on the result selector
+#   fast    waits, plus fast_nav blocking of images/media/fonts/trackers
+#
+#   python Python/bench_browser.py --runs 20 --json before.json
+#   python Python/bench_browser.py --runs 20 --compare before.json
+#
+# The stand-in serves a search page with slow images, a web font, a video
+# and a third-party "tracker" (tracker.localhost, which Chromium resolves
+# to loopback), and answers the search through a delayed fetch.
+
+__dirname = os.path.dirname(os.path.abspath(__file__))
+
+PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>stand-in</title>
+<style>
+@font-face {{ font-family: Heavy; src: url(/font.woff2); }}
+body {{ font-family: Heavy, sans-serif; }}
+</style>
+<script src="http://tracker.localhost:{port}/t.js"></script>
+</head><body>
+<input id="q"> <button id="go">Search</button>
+<ul id="results"></ul>
+<video src="/media.mp4" autoplay muted></video>
+{images}
+<script>
+document.getElementById("go").onclick = async () => {{
+  const q = document.getElementById("q").value;
+  const items = await (await fetch("/api/search?q=" + encodeURIComponent(q))).json();
+  document.getElementById("results").innerHTML =
+    items.map(t => `<li class="result">${{t}}</li>`).join("");
+}};
+</script>
+</body></html>"""
+
+ASSETS = {
+    # path suffix -> (content type, bytes)
+    ".png": ("image/png", 64 * 1024),
+    ".woff2": ("font/woff2", 128 * 1024),
+    ".mp4": ("video/mp4", 512 * 1024),
+    ".js": ("application/javascript", 32 * 1024),
+}
+
+
+class StandInSite:
+    def __init__(self, images=30, asset_delay=0.04, tracker_delay=0.3, api_delay=0.1):
+        self.images = images
+        self.asset_delay = asset_delay
+        self.tracker_delay = tracker_delay
+        self.api_delay = api_delay
+        self.requests = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                site.handle(self)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}/"
+
+    def handle(self, req):
+        url = urlsplit(req.path)
+        if req.headers.get("Host", "").startswith("tracker.localhost"):
+            time.sleep(self.tracker_delay)
+            body, ctype = b"/* tracker */" + b" " * ASSETS[".js"][1], ASSETS[".js"][0]
+        elif url.path == "/":
+            images = "\n".join(f'<img src="/img/{i}.png" width="64" height="64">' for i in range(self.images))
+            body, ctype = PAGE.format(port=self.port, images=images).encode(), "text/html"
+        elif url.path == "/api/search":
+            time.sleep(self.api_delay)
+            query = parse_qs(url.query).get("q", [""])[0]
+            body, ctype = json.dumps([f"{query} result {i}" for i in range(10)]).encode(), "application/json"
+        else:
+            ext = os.path.splitext(url.path)[1]
+            if ext not in ASSETS:
+                req.send_error(404)
+                return
+            time.sleep(self.asset_delay)
+            ctype, size = ASSETS[ext]
+            body = bytes(size)
+
+        with self._lock:
+            self.requests += 1
+            self.bytes += len(body)
+        req.send_response(200)
+        req.send_header("Content-Type", ctype)
+        req.send_header("Content-Length", str(len(body)))
+        req.send_header("Cache-Control", "no-store")
+        req.end_headers()
+        req.wfile.write(body)
+
+    def reset(self):
+        with self._lock:
+            self.requests, self.bytes = 0, 0
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+
+async def site_search(page, url, query, mode, fixed_wait_ms):
+    if mode == "legacy":
+        await page.goto(url, wait_until="load")
+    else:
+        await page.goto(url, wait_until="domcontentloaded")
+    await page.fill("#q", query)
+    await page.click("#go")
+    if mode == "legacy":
+        await page.wait_for_timeout(fixed_wait_ms)
+    else:
+        await page.wait_for_selector("li.result")
+    return await page.locator("li.result").count()
+
+
+async def bench_mode(pool, site, mode, runs, fixed_wait_ms):
+    site.reset()
+    latencies, found, blocked = [], 0, 0
+    for i in range(runs):
+        start = time.perf_counter()
+        async with pool.context(fast=(mode == "fast")) as context:
+            page = await context.new_page()
+            found += await site_search(page, site.url, f"query {i}", mode, fixed_wait_ms)
+            blocker = getattr(context, "blocker", None)
+            blocked += blocker.blocked if blocker else 0
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "runs": runs,
+        "mean_ms": sum(latencies) / runs * 1000,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "requests_served": site.requests,
+        "kb_served": site.bytes // 1024,
+        "requests_blocked": blocked,
+        "results_found": found,
+    }
+
+
+def print_table(rows, baseline=None):
+    base = {r["mode"]: r for r in (baseline or [])}
+    print(f"{'mode':<8}{'runs':>6}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'served':>8}{'KB':>8}{'blocked':>9}{'vs base':>10}")
+    for r in rows:
+        old = base.get(r["mode"])
+        delta = change(r, old, "mean_ms")
+        print(
+            f"{r['mode']:<8}{r['runs']:>6}{r['mean_ms']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+            f"{r['requests_served']:>8}{r['kb_served']:>8}{r['requests_blocked']:>9}{delta:>10}"
+        )
+
+
+async def run(args):
+    # fast_nav reads this at import: treat the stand-in's tracker as one
+    os.environ.setdefault("BROWSER_BLOCK_DOMAINS", "tracker.localhost")
+    sys.path.insert(0, __dirname)
+    from browser_pool import BrowserPool
+
+    site = StandInSite(args.images, args.asset_delay_ms / 1000, args.tracker_delay_ms / 1000).start()
+    rows = []
+    try:
+        async with BrowserPool(size=1) as pool:
+            # one untimed task so every mode starts from a warm browser
+            async with pool.page() as page:
+                await page.goto(site.url, wait_until="domcontentloaded")
+            for mode in args.mode or ["legacy", "waits", "fast"]:
+                rows.append(await bench_mode(pool, site, mode, args.runs, args.fixed_wait_ms))
+    finally:
+        site.stop()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark page-automation modes against a local stand-in site")
+    parser.add_argument("--runs", type=int, default=10, help="tasks per mode")
+    parser.add_argument("--mode", action="append", choices=["legacy", "waits", "fast"], help="only these modes (repeatable)")
+    parser.add_argument("--images", type=int, default=30, help="images on the stand-in page")
+    parser.add_argument("--asset-delay-ms", type=float, default=40, help="server delay per image/font/media")
+    parser.add_argument("--tracker-delay-ms", type=float, default=300, help="server delay for the tracker script")
+    parser.add_argument("--fixed-wait-ms", type=float, default=3000, help="legacy mode's fixed wait after submitting")
+    add_output_arguments(parser, "latency")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args))
+    report(
+        args, rows, print_table, images=args.images, asset_delay_ms=args.asset_delay_ms,
+        tracker_delay_ms=args.tracker_delay_ms, fixed_wait_ms=args.fixed_wait_ms,
+    )
+
+
+if __name__ == "__main__":
+    main()
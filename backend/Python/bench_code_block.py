@@ -0,0 +1,91 @@
+import os, sys, io, time, argparse
+from bench_common import add_output_arguments, change, report
+
+# Layout cost of a code block as the old single Paragraph (code_to_html:
+# &nbsp; + <br/>) versus code_block.CodeBlock, across listing sizes.
+#
+#   python Python/bench_code_block.py --json before.json
+#   python Python/bench_code_block.py --lines 20000 --impl codeblock --compare before.json
+#
+# Each run builds a whole document holding just the listing, so the time
+# includes flowable construction, every page split and drawing. ms/kline
+# staying flat as --lines grows is what "linear" means here.
+
+os.environ["PDF_CACHE_MAX_MB"] = "0"
+__dirname = os.path.dirname(os.path.abspath(__file__))
+
+LINE = "    result = handler(event, context)  # {i}: retry with backoff if x < limit && y > 0"
+
+
+def listing(lines):
+    return "\n".join(LINE.format(i=i) for i in range(lines))
+
+
+def flowable(pdf, impl, code, line_numbers):
+    if impl == "paragraph":
+        from bench_markdown import code_to_html
+
+        return pdf.text_paragraph(code_to_html(code), pdf.styles()["code"])
+    from code_block import CodeBlock
+
+    return CodeBlock(code, pdf.styles()["code"], line_numbers)
+
+
+def bench(pdf, impl, lines, runs, line_numbers):
+    code = listing(lines)
+    best, data = None, b""
+    for _ in range(runs):
+        buffer = io.BytesIO()
+        doc = pdf.new_doc(buffer)
+        start = time.perf_counter()
+        doc.build([flowable(pdf, impl, code, line_numbers)])
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+        data = buffer.getvalue()
+    return {
+        "impl": impl,
+        "lines": lines,
+        "seconds": best,
+        "ms_per_kline": best * 1000 / (lines / 1000),
+        "pages": doc.page,
+        "pdf_bytes": len(data),
+    }
+
+
+def print_table(rows, baseline=None):
+    base = {(r["impl"], r["lines"]): r for r in (baseline or [])}
+    print(f"{'impl':<11}{'lines':>7}{'ms':>11}{'ms/kline':>10}{'pages':>7}{'KB':>8}{'vs base':>10}")
+    for r in rows:
+        old = base.get((r["impl"], r["lines"]))
+        delta = change(r, old, "seconds")
+        print(
+            f"{r['impl']:<11}{r['lines']:>7}{r['seconds'] * 1000:>11.1f}{r['ms_per_kline']:>10.1f}"
+            f"{r['pages']:>7}{r['pdf_bytes'] // 1024:>8}{delta:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark code block layout: Paragraph vs CodeBlock")
+    parser.add_argument("--lines", type=int, action="append", help="listing sizes (repeatable; default 100, 1000, 5000)")
+    parser.add_argument("--impl", action="append", choices=["paragraph", "codeblock"], help="only these implementations")
+    parser.add_argument("--runs", type=int, default=1, help="builds per size; the fastest counts")
+    parser.add_argument("--line-numbers", action="store_true", help="CodeBlock with its line-number gutter")
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    sys.path.insert(0, __dirname)
+    import pdf
+
+    rows = [
+        bench(pdf, impl, lines, args.runs, args.line_numbers)
+        for impl in args.impl or ["paragraph", "codeblock"]
+        for lines in args.lines or [100, 1000, 5000]
+    ]
+
+    import reportlab
+
+    report(args, rows, print_table, reportlab=reportlab.Version, line_numbers=args.line_numbers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import os, json, time, platform, subprocess
+
+# Shared plumbing for the bench_*.py scripts: the --json / --compare flags,
+# the meta block written with results, and the small statistics helpers.
+# Each bench keeps its own measurements and print_table(rows, baseline).
+
+__dirname = os.path.dirname(os.path.abspath(__file__))
+
+
+def add_output_arguments(parser, compared="timings"):
+    parser.add_argument("--json", help="write machine-readable results to this path")
+    parser.add_argument("--compare", help=f"earlier --json results to diff {compared} against")
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=__dirname,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def change(new, old, key, digits=0):
+    """"+12%" for new[key] against old[key]; "" without a usable baseline."""
+    if not old or not old.get(key):
+        return ""
+    return f"{(new[key] / old[key] - 1) * 100:+.{digits}f}%"
+
+
+def report(args, rows, print_table, **meta):
+    """Print rows against the --compare baseline and write --json with a meta block."""
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print_table(rows, baseline)
+
+    if args.json:
+        meta = {
+            "commit": git_commit(),
+            "timestamp": int(time.time()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            **meta,
+        }
+        with open(args.json, "w") as f:
+            json.dump({"meta": meta, "results": rows}, f, indent=2)
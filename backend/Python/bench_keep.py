@@ -0,0 +1,140 @@
+import os, sys, json, time, random, argparse, tempfile
+from bench_common import add_output_arguments, change, percentile, report
+
+# Throughput benchmark for keep_ops.py against the offline backend
+# (keep_offline.py), so no Google account or network is involved.
+#
+#   python Python/bench_keep.py --notes 5000 --json before.json
+#   python Python/bench_keep.py --notes 5000 --latency-ms 80 --compare before.json
+#
+# Requests go through KeepSession exactly as in --serve mode, results are
+# JSON-encoded like the service would, and the state snapshot is written to
+# a throwaway KEEP_STATE_DIR. Latency is per request, wall clock.
+
+__dirname = os.path.dirname(os.path.abspath(__file__))
+
+WORDS = "milk eggs bread meeting project review budget travel idea draft call plan garden book".split()
+
+
+def configure(args):
+    # keep_ops.configure() reads these on first use, and load_dotenv leaves
+    # variables that are already set alone, so they win over backend/.env
+    os.environ["KEEP_BACKEND"] = "offline"
+    os.environ["KEEP_STATE_DIR"] = tempfile.mkdtemp(prefix="bench-keep-")
+    os.environ["KEEP_OFFLINE_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["KEEP_OFFLINE_JITTER_MS"] = str(args.jitter_ms)
+    os.environ.pop("KEEP_OFFLINE_STORE", None)
+    sys.path.insert(0, __dirname)
+
+
+def sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def seed(session, rng, count):
+    # seeding itself goes through batch, 500 notes per sync
+    for start in range(0, count, 500):
+        operations = [
+            {"op": "add", "title": sentence(rng, 3), "text": sentence(rng, 40)}
+            for _ in range(min(500, count - start))
+        ]
+        session.run("batch", {"operations": operations})
+    return [note.id for note in session.keep.all()]
+
+
+def workloads(rng, ids, batch_size):
+    return {
+        "list": lambda: ("list", {"limit": 50, "cursor": rng.choice(ids[:-50] or [None])}),
+        "list_all": lambda: ("list", {"include_archived": True}),
+        "search": lambda: ("search", {"query": rng.choice(WORDS)}),
+        "add": lambda: ("add", {"title": sentence(rng, 3), "text": sentence(rng, 40)}),
+        "update": lambda: ("update", {"id": rng.choice(ids), "text": sentence(rng, 40)}),
+        "batch": lambda: ("batch", {"operations": [
+            {"op": "update", "id": rng.choice(ids), "text": sentence(rng, 40)}
+            if i % 2 else {"op": "archive", "id": rng.choice(ids), "archive": bool(i % 3)}
+            for i in range(batch_size)
+        ]}),
+        # parallel tool calls landing in one service window: 8 separate
+        # requests that should share a single sync
+        "burst": lambda: ("window", [
+            ("update", {"id": rng.choice(ids), "text": sentence(rng, 40)}) if i % 2
+            else ("search", {"query": rng.choice(WORDS), "limit": 5})
+            for i in range(8)
+        ]),
+    }
+
+
+def run_workload(session, keep_ops, make_request, ops):
+    latencies = []
+    calls_before = session.keep._keep_api.calls
+    start = time.perf_counter()
+    for _ in range(ops):
+        op, params = make_request()
+        t0 = time.perf_counter()
+        items = []
+        results = session.run_window(params) if op == "window" else [session.run(op, params)]
+        for result in results:
+            json.dumps(keep_ops.drain(result, lambda item: items.append(json.dumps(item))))
+        latencies.append(time.perf_counter() - t0)
+    total = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "ops": ops,
+        "ops_per_sec": ops / total,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "round_trips": session.keep._keep_api.calls - calls_before,
+    }
+
+
+def print_table(rows, baseline=None):
+    base = {r["workload"]: r for r in (baseline or [])}
+    print(f"{'workload':<10}{'ops':>6}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'trips':>7}{'vs base':>10}")
+    for r in rows:
+        old = base.get(r["workload"])
+        delta = change(r, old, "ops_per_sec")
+        print(
+            f"{r['workload']:<10}{r['ops']:>6}{r['ops_per_sec']:>10.1f}{r['p50_ms']:>10.2f}"
+            f"{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['max_ms']:>10.2f}{r['round_trips']:>7}{delta:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keep_ops.py against the offline Keep backend")
+    parser.add_argument("--notes", type=int, default=2000, help="notes in the account before measuring")
+    parser.add_argument("--ops", type=int, default=100, help="requests per workload")
+    parser.add_argument("--batch-size", type=int, default=50, help="mutations per batch request")
+    parser.add_argument("--latency-ms", type=float, default=0, help="simulated round trip per sync")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="random extra latency per sync")
+    parser.add_argument("--workload", action="append", help="only run these workloads (repeatable)")
+    parser.add_argument("--seed", type=int, default=1)
+    add_output_arguments(parser, "throughput")
+    args = parser.parse_args()
+
+    configure(args)
+    import keep_ops
+
+    rng = random.Random(args.seed)
+    session = keep_ops.KeepSession()
+    session.run("list", {"limit": 1})  # connect
+    started = time.perf_counter()
+    ids = seed(session, rng, args.notes)
+    print(f"seeded {len(ids)} notes in {time.perf_counter() - started:.2f}s")
+
+    rows = []
+    for name, make_request in workloads(rng, ids, args.batch_size).items():
+        if not args.workload or name in args.workload:
+            ops = max(1, args.ops // 10) if name == "list_all" else args.ops
+            rows.append({"workload": name, **run_workload(session, keep_ops, make_request, ops)})
+
+    report(
+        args, rows, print_table, notes=args.notes, batch_size=args.batch_size,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+    )
+
+
+if __name__ == "__main__":
+    main()
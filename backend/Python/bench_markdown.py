@@ -0,0 +1,94 @@
+import re, timeit, argparse
+
+import pdf
+
+
+# The regex pipeline pdf.py used before markdown_to_blocks, kept here (and
+# only here) as the baseline it is measured against.
+def markdown_to_paragraph(text):
+    text = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", text)
+    text = re.sub(r"\*(.+?)\*", r"<i>\1</i>", text)
+    return text
+
+
+def parse_blocks(text):
+    blocks = []
+    code_block_pattern = re.compile(r"```(.*?)```", re.DOTALL)
+
+    last_end = 0
+    for match in code_block_pattern.finditer(text):
+        if match.start() > last_end:
+            blocks.append({"type": "text", "text": text[last_end:match.start()]})
+        code_text = match.group(1).strip()
+        blocks.append({"type": "code", "text": code_text})
+        last_end = match.end()
+
+    if last_end < len(text):
+        blocks.append({"type": "text", "text": text[last_end:]})
+
+    return blocks
+
+
+# Paragraph markup for a code block, from before code_block.CodeBlock
+# (bench_code_block.py lays it out as the "paragraph" baseline)
+def code_to_html(code):
+    return pdf.escape_text(code).replace(" ", "&nbsp;")
+
+
+# The pre-tokenizer pipeline from generate_pdf: fence regex, split on blank
+# lines, two re.sub passes per paragraph and chained replaces for code
+def legacy_markup(text):
+    out = []
+    for block in parse_blocks(text):
+        if block["type"] == "text":
+            for para in block["text"].split("\n\n"):
+                if para.strip():
+                    out.append(markdown_to_paragraph(para.strip().replace("\n", "<br/>")))
+        else:
+            out.append(
+                block["text"]
+                .replace("&", "&amp;")
+                .replace("<", "&lt;")
+                .replace(">", "&gt;")
+                .replace(" ", "&nbsp;")
+                .replace("\n", "<br/>")
+            )
+    return out
+
+
+def tokenizer_markup(text):
+    return [
+        code_to_html(b["text"]) if b["type"] == "code" else b["text"]
+        for b in pdf.markdown_to_blocks(text)
+    ]
+
+
+def corpora(scale):
+    prose = "Some **bold** words, some *italic* ones and `inline code`.\n" * 4
+    code = "```python\nfor i in range(10):\n    print(i < 5 and i > 2)\n```\n"
+    return {
+        "prose": (prose + "\n") * 50 * scale,
+        "code": (code + "Text between blocks.\n\n") * 50 * scale,
+        "mixed": ("# Heading\n- item **one**\n- item *two*\n\n" + prose + "\n" + code) * 20 * scale,
+        "unmatched_stars": "*a " * 5000 * scale,
+        "star_run": "*" * 20000 * scale,
+        "unclosed_fences": "``` x\n" * 2000 * scale,
+        "backtick_pairs": "` a " * 5000 * scale,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the markdown tokenizer with the legacy regex pipeline")
+    parser.add_argument("--scale", type=int, default=1, help="multiply corpus sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'corpus':<18}{'chars':>9}{'legacy ms':>12}{'tokenizer ms':>14}{'speedup':>9}")
+    for name, text in corpora(args.scale).items():
+        legacy = min(timeit.repeat(lambda: legacy_markup(text), number=1, repeat=args.repeat))
+        tokenizer = min(timeit.repeat(lambda: tokenizer_markup(text), number=1, repeat=args.repeat))
+        print(f"{name:<18}{len(text):>9}{legacy * 1000:>12.2f}{tokenizer * 1000:>14.2f}{legacy / tokenizer:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
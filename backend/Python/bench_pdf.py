@@ -0,0 +1,137 @@
+import os, sys, io, json, time, base64, argparse, resource, subprocess, tracemalloc
+from bench_common import add_output_arguments, change, report
+
+# Phase benchmark for pdf.py: import + font load, parse, flowable
+# construction, doc.build and base64 encoding, over synthetic corpora.
+#
+#   python Python/bench_pdf.py --json before.json
+#   python Python/bench_pdf.py --json after.json --compare before.json
+#   python Python/bench_pdf.py --profile compact --compare before.json   (sizes too)
+#
+# Each phase is timed without tracemalloc, then re-run under tracemalloc for
+# its peak Python allocation; max RSS is sampled after the phase. The render
+# cache is disabled so doc.build is always measured.
+
+os.environ["PDF_CACHE_MAX_MB"] = "0"
+__dirname = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_PROBE = """
+import json, time, resource
+t0 = time.perf_counter()
+import pdf
+t1 = time.perf_counter()
+import fonts
+fonts.ensure_variants(pdf.default_font, True, True)
+t2 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "font_load": t2 - t1,
+                  "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+def corpora(scale):
+    from emoji_atlas import load_emoji_list
+
+    emojis = "".join(load_emoji_list()[:200])
+    prose = "The agent **summarized** the thread and *flagged* two follow-ups for `review`. " * 8
+    code = "def handler(event):\n    if event['type'] == 'x' and a < b:\n        return process(event)\n" * 20
+    return {
+        "tiny_note": [{"type": "text", "text": "Buy milk **today**."}],
+        "long_prose": [{"type": "text", "text": f"## Section {i}\n\n{prose}\n\n{prose}"} for i in range(40 * scale)],
+        "code_heavy": [{"type": "text", "text": f"Step {i}:\n```python\n{code}```"} for i in range(10 * scale)],
+        "emoji_heavy": [{"type": "text", "text": f"Reactions {i}: {emojis}"} for i in range(10 * scale)],
+        "pathological": [
+            {"type": "text", "text": "*a " * 4000 * scale},
+            {"type": "text", "text": "``` x\n" * 500 * scale},
+            {"type": "text", "text": "**" * 3000 * scale},
+        ],
+    }
+
+
+def measure(fn):
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {
+        "seconds": seconds,
+        "peak_alloc_kb": peak // 1024,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def bench_import():
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], cwd=__dirname,
+        capture_output=True, text=True, check=True,
+    )
+    probe = json.loads(out.stdout)
+    return [
+        {"corpus": "-", "phase": "import", "seconds": probe["import"], "max_rss_kb": probe["rss_kb"]},
+        {"corpus": "-", "phase": "font_load", "seconds": probe["font_load"], "max_rss_kb": probe["rss_kb"]},
+    ]
+
+
+def bench_corpus(name, content, profile="default"):
+    import pdf
+
+    rows = []
+    blocks, stats = measure(lambda: [b for item in content for b in pdf.item_to_blocks(item)])
+    rows.append({"corpus": name, "phase": "parse", **stats})
+
+    flowables, stats = measure(lambda: [pdf.block_to_flowable(b) for b in blocks])
+    rows.append({"corpus": name, "phase": "flowables", **stats})
+
+    def build():
+        buffer = io.BytesIO()
+        # doc.build consumes its list, so hand it fresh flowables every run
+        with pdf.output_profile(profile):
+            pdf.new_doc(buffer).build([pdf.block_to_flowable(b) for b in blocks])
+        return buffer.getvalue()
+
+    data, stats = measure(build)
+    rows.append({"corpus": name, "phase": "build", "pdf_bytes": len(data), **stats})
+
+    _, stats = measure(lambda: base64.b64encode(data).decode("ascii"))
+    rows.append({"corpus": name, "phase": "encode", **stats})
+    return rows
+
+
+def print_table(rows, baseline=None):
+    base = {(r["corpus"], r["phase"]): r for r in (baseline or [])}
+    print(f"{'corpus':<14}{'phase':<11}{'ms':>10}{'peak KB':>10}{'rss KB':>10}{'vs base':>10}{'PDF KB':>9}{'vs base':>10}")
+    for r in rows:
+        old = base.get((r["corpus"], r["phase"]))
+        delta = change(r, old, "seconds")
+        size = f"{r['pdf_bytes'] / 1024:.1f}" if "pdf_bytes" in r else ""
+        size_delta = change(r, old, "pdf_bytes", 1) if size else ""
+        print(
+            f"{r['corpus']:<14}{r['phase']:<11}{r['seconds'] * 1000:>10.2f}"
+            f"{r.get('peak_alloc_kb', ''):>10}{r['max_rss_kb']:>10}{delta:>10}{size:>9}{size_delta:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pdf.py phase by phase")
+    parser.add_argument("--scale", type=int, default=1, help="multiply corpus sizes")
+    parser.add_argument("--corpus", action="append", help="only run these corpora (repeatable)")
+    parser.add_argument("--profile", default="default", choices=["default", "compact"], help="pdf.py output profile for the build phase")
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    sys.path.insert(0, __dirname)
+    rows = bench_import()
+    for name, content in corpora(args.scale).items():
+        if not args.corpus or name in args.corpus:
+            rows.extend(bench_corpus(name, content, args.profile))
+
+    import reportlab
+
+    report(args, rows, print_table, reportlab=reportlab.Version, scale=args.scale, profile=args.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import os, sys, json, argparse, statistics, subprocess
+from bench_common import add_output_arguments, change, report
+
+# Cold-start budget for the Python entry points the Node tools spawn.
+# Each module is imported in a fresh interpreter under `-X importtime` and
+# its cumulative import time (interpreter startup and site excluded) is
+# compared with BUDGET_MS. Heavy dependencies must stay off the startup
+# path entirely: LAZY lists modules that importing the entry point must not
+# load, because only rendering / an account request needs them.
+#
+#   python Python/bench_startup.py                  # table
+#   python Python/bench_startup.py --check          # exit 1 over budget
+#   python Python/bench_startup.py --json before.json
+#   python Python/bench_startup.py --compare before.json
+
+__dirname = os.path.dirname(os.path.abspath(__file__))
+
+# Median import time, ms. Measured at ~25 (pdf) and ~10 (keep_ops) once
+# reportlab/gkeepapi went lazy, against ~210 and ~130 before; the headroom
+# is for slower machines, not for new top-level imports.
+BUDGET_MS = {
+    "pdf": 60,
+    "keep_ops": 40,
+}
+
+LAZY = {
+    "pdf": ["reportlab", "concurrent.futures", "urllib.request"],
+    "keep_ops": ["gkeepapi", "gpsoauth", "requests", "dotenv", "sqlite3"],
+}
+
+PROBE = "import sys, json, {module}; print(json.dumps(sorted(sys.modules)))"
+
+
+def measure(module):
+    """One cold import: (cumulative ms, self-time per module, modules loaded)."""
+    env = {key: value for key, value in os.environ.items() if key != "PY_TRACE"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+        cwd=__dirname, env=env, capture_output=True, text=True, check=True,
+    )
+    total, own = None, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        own[name.strip()] = int(self_us) / 1000
+        if name.strip() == module:
+            total = int(cumulative_us) / 1000
+    return total, own, json.loads(proc.stdout)
+
+
+def bench(module, runs):
+    times, own, loaded = [], {}, []
+    for _ in range(runs):
+        total, own, loaded = measure(module)
+        times.append(total)
+    heaviest = sorted(own.items(), key=lambda kv: -kv[1])[:3]
+    return {
+        "module": module,
+        "runs": runs,
+        "median_ms": statistics.median(times),
+        "min_ms": min(times),
+        "budget_ms": BUDGET_MS[module],
+        "heaviest": [f"{name} {ms:.1f}ms" for name, ms in heaviest],
+        "eager": [
+            lazy for lazy in LAZY[module]
+            if any(name == lazy or name.startswith(lazy + ".") for name in loaded)
+        ],
+    }
+
+
+def print_table(rows, baseline=None):
+    base = {r["module"]: r for r in (baseline or [])}
+    print(f"{'module':<10}{'median ms':>11}{'min ms':>9}{'budget':>8}{'vs base':>10}  heaviest / eagerly loaded")
+    for r in rows:
+        old = base.get(r["module"])
+        delta = change(r, old, "median_ms")
+        print(
+            f"{r['module']:<10}{r['median_ms']:>11.1f}{r['min_ms']:>9.1f}{r['budget_ms']:>8}{delta:>10}"
+            f"  {', '.join(r['heaviest'])}"
+        )
+        if r["eager"]:
+            print(f"{'':<48}imported at startup: {', '.join(r['eager'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of the Python entry points")
+    parser.add_argument("--runs", type=int, default=7, help="fresh interpreters per module")
+    parser.add_argument("--module", action="append", choices=sorted(BUDGET_MS), help="only these modules (repeatable)")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a module is over budget or loads a LAZY module")
+    add_output_arguments(parser, "import time")
+    args = parser.parse_args()
+
+    rows = [bench(module, args.runs) for module in args.module or sorted(BUDGET_MS)]
+
+    report(args, rows, print_table)
+
+    if args.check:
+        failed = [r for r in rows if r["median_ms"] > r["budget_ms"] or r["eager"]]
+        for r in failed:
+            print(f"FAIL {r['module']}: {r['median_ms']:.1f}ms (budget {r['budget_ms']}ms)"
+                  + (f", eagerly imports {', '.join(r['eager'])}" if r["eager"] else ""), file=sys.stderr)
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
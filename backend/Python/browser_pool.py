@@ -0,0 +1,452 @@
+import os, sys, json, math, time, asyncio, argparse, importlib, threading, contextlib
+from dotenv import load_dotenv
+from playwright.async_api import async_playwright
+
+# the settings below (and fast_nav's and session_cache's) may come from
+# backend/.env; --serve reads them before any task module has loaded it
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".env"))
+
+import fast_nav, session_cache
+
+# Warm Chromium for the page-automation scripts (chatgpt.py, folder.py,
+# Moodle.py, godaddy.py).
+#
+# A BrowserPool keeps Chromium processes running and gives every task its
+# own BrowserContext (separate cookies, storage and cache) on one of them,
+# so a task pays for a new context (milliseconds) instead of a browser
+# launch. Tasks are `async def task(page, **params)` functions; run them with
+#
+#   async with pool.page() as page:
+#       result = await task(page, ...)
+#
+# or keep one pool warm across calls in a resident process:
+#
+#   python Python/browser_pool.py --serve
+#     {"id": 1, "task": "youtube_search", "params": {"query": "lofi"}}
+#
+#   BROWSER_POOL_SIZE          most browsers kept running (default 2)
+#   BROWSER_POOL_CONTEXTS      contexts open at once per browser (default 4)
+#   BROWSER_POOL_MIN_WARM      browsers kept even when idle (default 1)
+#   BROWSER_POOL_IDLE_SEC      close other browsers idle this long (default 300)
+#   BROWSER_POOL_MAX_USES      contexts per browser before it is recycled (default 100)
+#   BROWSER_POOL_CONTEXT_REUSE tasks per context, cookies cleared in between
+#                              (default 1: every task gets a fresh context)
+#   BROWSER_FAST_MODE          1: block images/media/fonts and trackers in
+#                              every context (see fast_nav.py); per call with fast=
+#   CHROME_PATH                Chromium/Chrome binary instead of Playwright's
+#
+# Tasks that log in name their account with a `session` attribute,
+# task.session(**params) -> (site, account); run() then opens the context
+# with that account's saved cookies and storage (session_cache.py) so the
+# task can skip its login form while the session holds.
+
+POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE") or 2)
+CONTEXTS_PER_BROWSER = int(os.getenv("BROWSER_POOL_CONTEXTS") or 4)
+MIN_WARM = int(os.getenv("BROWSER_POOL_MIN_WARM") or 1)
+IDLE_SECONDS = float(os.getenv("BROWSER_POOL_IDLE_SEC") or 300)
+MAX_USES = int(os.getenv("BROWSER_POOL_MAX_USES") or 100)
+CONTEXT_REUSE = int(os.getenv("BROWSER_POOL_CONTEXT_REUSE") or 1)
+FAST_MODE = os.getenv("BROWSER_FAST_MODE", "0") not in ("", "0", "false")
+
+# name -> "module:function", imported on first use
+TASKS = {
+    "chatgpt": "chatgpt:ask",
+    "youtube_search": "folder:search_youtube",
+    "moodle_login": "Moodle:moodle_login",
+    "godaddy_login": "godaddy:godaddy_login",
+}
+
+
+class PooledBrowser:
+    def __init__(self, browser):
+        self.browser = browser
+        self.active = 0
+        self.uses = 0
+        self.idle_contexts = []   # [context, uses, fast] ready to hand out again
+        self.last_used = time.monotonic()
+
+
+class BrowserPool:
+    def __init__(self, size=POOL_SIZE, headless=True, launch_args=None,
+                 contexts_per_browser=CONTEXTS_PER_BROWSER, min_warm=MIN_WARM,
+                 idle_seconds=IDLE_SECONDS, max_uses=MAX_USES, context_reuse=CONTEXT_REUSE,
+                 fast=FAST_MODE):
+        self.size = size
+        self.fast = fast
+        self.headless = headless
+        self.launch_args = launch_args or []
+        self.contexts_per_browser = contexts_per_browser
+        self.min_warm = min_warm
+        self.idle_seconds = idle_seconds
+        self.max_uses = max_uses
+        self.context_reuse = context_reuse
+        self.browsers = []
+        self.launched = 0
+        self._launching = 0
+        self._playwright = None
+        self._reaper = None
+        self._changed = None
+
+    async def start(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+            self._changed = asyncio.Condition()
+            self._reaper = asyncio.create_task(self._reap())
+            for _ in range(min(self.min_warm, self.size)):
+                self.browsers.append(PooledBrowser(await self._launch()))
+        return self
+
+    async def close(self):
+        if self._playwright is None:
+            return
+        self._reaper.cancel()
+        for pooled in self.browsers:
+            await self._close_browser(pooled)
+        self.browsers = []
+        await self._playwright.stop()
+        self._playwright = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _launch(self):
+        self.launched += 1
+        browser = await self._playwright.chromium.launch(
+            headless=self.headless,
+            executable_path=os.getenv("CHROME_PATH") or None,
+            args=self.launch_args,
+        )
+        # wake waiters so a crashed browser's slot is reclaimed right away
+        browser.on("disconnected", lambda _: asyncio.ensure_future(self._notify()))
+        return browser
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def _close_browser(self, pooled):
+        for context, _, _ in pooled.idle_contexts:
+            with contextlib.suppress(Exception):
+                await context.close()
+        pooled.idle_contexts = []
+        with contextlib.suppress(Exception):
+            await pooled.browser.close()
+
+    def _prune(self):
+        """
+        Drop browsers that crashed or were closed under us so they stop
+        counting against size; called with the lock held. Returns them for
+        closing outside it.
+        """
+        dead = [b for b in self.browsers if not b.browser.is_connected() and b.active == 0]
+        for pooled in dead:
+            self.browsers.remove(pooled)
+        return dead
+
+    def _pick(self):
+        # least busy browser that still has room and hasn't hit its use limit
+        candidates = [
+            b for b in self.browsers
+            if b.active < self.contexts_per_browser and b.uses < self.max_uses and b.browser.is_connected()
+        ]
+        return min(candidates, key=lambda b: b.active) if candidates else None
+
+    async def _acquire_browser(self):
+        dead = []
+        async with self._changed:
+            while True:
+                dead.extend(self._prune())
+                pooled = self._pick()
+                if pooled and (pooled.active == 0 or len(self.browsers) + self._launching >= self.size):
+                    break
+                if len(self.browsers) + self._launching < self.size:
+                    # launch outside the lock so other tasks keep flowing
+                    self._launching += 1
+                    self._changed.release()
+                    try:
+                        browser = await self._launch()
+                    finally:
+                        await self._changed.acquire()
+                        self._launching -= 1
+                    pooled = PooledBrowser(browser)
+                    self.browsers.append(pooled)
+                    break
+                await self._changed.wait()
+            pooled.active += 1
+            pooled.uses += 1
+        for gone in dead:
+            await self._close_browser(gone)
+        return pooled
+
+    async def _release_browser(self, pooled):
+        async with self._changed:
+            pooled.active -= 1
+            pooled.last_used = time.monotonic()
+            retire = pooled.active == 0 and (pooled.uses >= self.max_uses or not pooled.browser.is_connected())
+            if retire:
+                self.browsers.remove(pooled)
+            self._changed.notify_all()
+        if retire:
+            await self._close_browser(pooled)
+
+    @contextlib.asynccontextmanager
+    async def context(self, fast=None, session=None, **options):
+        """
+        An isolated BrowserContext; extra options go to new_context(). With
+        fast (default: the pool's setting) unneeded requests are blocked.
+        session=(site, account) starts it from that account's saved session,
+        if there is one (context.session_restored).
+        """
+        await self.start()
+        fast = self.fast if fast is None else fast
+        state = session_cache.load(*session) if session else None
+        if state:
+            options = {**options, "storage_state": state}
+        pooled = await self._acquire_browser()
+        context, uses = None, 0
+        try:
+            idle = [c for c in pooled.idle_contexts if c[2] == fast]
+            if self.context_reuse > 1 and not options and not session and idle:
+                pooled.idle_contexts.remove(idle[-1])
+                context, uses, _ = idle[-1]
+            else:
+                context = await pooled.browser.new_context(**options)
+                if fast:
+                    context.blocker = await fast_nav.enable(context)
+            # a signed-in context is never handed to another task
+            context.session, context.session_restored = session, state is not None
+            uses += 1
+            yield context
+        finally:
+            reusable = (
+                context is not None and not options and not session and uses < self.context_reuse
+                and pooled.browser.is_connected() and pooled.uses < self.max_uses
+            )
+            if reusable:
+                try:
+                    for page in context.pages:
+                        await page.close()
+                    await context.clear_cookies()
+                    await context.clear_permissions()
+                    pooled.idle_contexts.append([context, uses, fast])
+                except Exception:
+                    reusable = False
+            if context is not None and not reusable:
+                with contextlib.suppress(Exception):
+                    await context.close()
+            await self._release_browser(pooled)
+
+    @contextlib.asynccontextmanager
+    async def page(self, fast=None, session=None, **options):
+        async with self.context(fast, session, **options) as context:
+            yield await context.new_page()
+
+    async def run(self, task, fast=None, **params):
+        session = task.session(**params) if hasattr(task, "session") else None
+        async with self.page(fast, session) as page:
+            return await task(page, **params)
+
+    async def _reap(self):
+        # close browsers nobody has used for idle_seconds, down to min_warm
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_seconds / 4))
+            now = time.monotonic()
+            async with self._changed:
+                dead = self._prune()
+                idle = [b for b in self.browsers if b.active == 0 and now - b.last_used > self.idle_seconds]
+                idle = dead + idle[:max(0, len(self.browsers) - self.min_warm)]
+                for pooled in idle[len(dead):]:
+                    self.browsers.remove(pooled)
+                if dead:
+                    self._changed.notify_all()
+            for pooled in idle:
+                await self._close_browser(pooled)
+
+    def stats(self):
+        return {
+            "browsers": len(self.browsers),
+            "launched": self.launched,
+            "active_contexts": sum(b.active for b in self.browsers),
+            "idle_contexts": sum(len(b.idle_contexts) for b in self.browsers),
+            "uses": [b.uses for b in self.browsers],
+        }
+
+
+def resolve_task(name):
+    if name not in TASKS:
+        raise ValueError(f"Unknown task: {name}")
+    module, function = TASKS[name].split(":")
+    return getattr(importlib.import_module(module), function)
+
+
+def run_task(task, headless=True, fast=FAST_MODE, **params):
+    """One-shot helper for the scripts' own CLIs: a pool of one, then exit."""
+    async def main():
+        async with BrowserPool(size=1, headless=headless, fast=fast) as pool:
+            return await pool.run(task, **params)
+    return asyncio.run(main())
+
+
+async def run_many(pool, task, jobs, concurrency=4, timeout=60, retries=1, fast=None):
+    """
+    Run task once per params dict in jobs, at most `concurrency` at a time.
+    Each attempt gets `timeout` seconds and a failed or timed-out job is
+    retried up to `retries` times. Yields one result dict per job, in the
+    order they finish.
+    """
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(index, params):
+        async with slots:
+            start = time.perf_counter()
+            error = None
+            for attempt in range(1, retries + 2):
+                try:
+                    result = await asyncio.wait_for(pool.run(task, fast, **params), timeout)
+                except asyncio.TimeoutError:
+                    error = f"timed out after {timeout}s"
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                else:
+                    # a task reporting its own error (bad credentials...) isn't retried
+                    outcome = {"error": result["error"]} if isinstance(result, dict) and "error" in result else {"result": result}
+                    break
+                if attempt <= retries:
+                    await asyncio.sleep(0.5 * attempt)
+            else:
+                outcome = {"error": error}
+            return {"index": index, "params": params, **outcome,
+                    "attempts": attempt, "seconds": round(time.perf_counter() - start, 3)}
+
+    pending = [asyncio.create_task(one(i, params)) for i, params in enumerate(jobs)]
+    try:
+        for finished in asyncio.as_completed(pending):
+            yield await finished
+    finally:
+        for job in pending:
+            job.cancel()
+
+
+def pool_for(concurrency, **options):
+    # enough browsers that `concurrency` contexts fit without queueing
+    size = max(1, math.ceil(concurrency / CONTEXTS_PER_BROWSER))
+    return BrowserPool(size=size, min_warm=size, **options)
+
+
+def run_batch(task, jobs, concurrency=4, timeout=60, retries=1, headless=True, fast=FAST_MODE, out=sys.stdout):
+    """
+    Batch mode for the scripts' CLIs: one JSON line per job as it finishes,
+    then a summary line. Returns the number of failed jobs.
+    """
+    async def main():
+        failed = 0
+        start = time.perf_counter()
+        async with pool_for(concurrency, headless=headless, fast=fast) as pool:
+            async for result in run_many(pool, task, jobs, concurrency, timeout, retries):
+                failed += "error" in result
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+        elapsed = time.perf_counter() - start
+        summary = {"jobs": len(jobs), "failed": failed, "seconds": round(elapsed, 3), "concurrency": concurrency}
+        out.write(json.dumps({"summary": summary}) + "\n")
+        return failed
+    return asyncio.run(main())
+
+
+def add_batch_arguments(parser):
+    parser.add_argument("--batch", help="file with one query per line ('-' for stdin)")
+    parser.add_argument("--concurrency", type=int, default=4, help="pages working at once in batch mode")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds per attempt in batch mode")
+    parser.add_argument("--retries", type=int, default=1, help="extra attempts for a failed query")
+
+
+def read_queries(path):
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    with f:
+        return [line.strip() for line in f if line.strip()]
+
+
+# Resident mode: {"id", "task", "params", "fast"} per line on stdin, one
+# {"id", "result"} or {"id", "error"} line per request on stdout. Requests
+# run concurrently on the pool and reply in the order they finish. A
+# request with "batch": [params, ...] (plus optional "concurrency",
+# "timeout", "retries") runs them all and replies with the list of
+# per-job results in job order.
+async def serve(stdin=sys.stdin, stdout=sys.stdout):
+    loop = asyncio.get_running_loop()
+    lines = asyncio.Queue()
+
+    def read():
+        for line in stdin:
+            if line.strip():
+                loop.call_soon_threadsafe(lines.put_nowait, line)
+        loop.call_soon_threadsafe(lines.put_nowait, None)
+
+    def write(message):
+        stdout.write(json.dumps(message) + "\n")
+        stdout.flush()
+
+    async def handle(line):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            if request.get("task") == "stats":
+                result = pool.stats()
+            elif "batch" in request:
+                task = resolve_task(request.get("task"))
+                results = [r async for r in run_many(
+                    pool, task, request["batch"], request.get("concurrency", 4),
+                    request.get("timeout", 60), request.get("retries", 1), request.get("fast"),
+                )]
+                result = sorted(results, key=lambda r: r["index"])
+            else:
+                task = resolve_task(request.get("task"))
+                result = await pool.run(task, request.get("fast"), **(request.get("params") or {}))
+            if isinstance(result, dict) and "error" in result:
+                write({"id": request_id, "error": result["error"]})
+            else:
+                write({"id": request_id, "result": result})
+        except Exception as e:
+            write({"id": request_id, "error": f"{type(e).__name__}: {e}"})
+
+    threading.Thread(target=read, daemon=True).start()
+    running = set()
+    async with BrowserPool() as pool:
+        while (line := await lines.get()) is not None:
+            job = asyncio.create_task(handle(line))
+            running.add(job)
+            job.add_done_callback(running.discard)
+        if running:
+            await asyncio.gather(*running)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm Chromium pool for the page-automation scripts")
+    parser.add_argument("--serve", action="store_true", help="run tasks from JSON lines on stdin")
+    parser.add_argument("task", nargs="?", choices=sorted(TASKS), help="run one task and print its result")
+    parser.add_argument("params", nargs="?", default="{}", help="task parameters as JSON")
+    parser.add_argument("--jobs", help="JSON Lines file of task parameters to run as a batch")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--retries", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.serve:
+        asyncio.run(serve())
+    elif args.task and args.jobs:
+        with open(args.jobs, encoding="utf-8") as f:
+            jobs = [json.loads(line) for line in f if line.strip()]
+        failed = run_batch(resolve_task(args.task), jobs, args.concurrency, args.timeout, args.retries)
+        sys.exit(1 if failed else 0)
+    elif args.task:
+        print(json.dumps(run_task(resolve_task(args.task), **json.loads(args.params)), ensure_ascii=False))
+    else:
+        parser.error("give a task or --serve")
+
+
+if __name__ == "__main__":
+    main()
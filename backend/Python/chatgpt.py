@@ -38,36 +38,62 @@
 
 
 
-from playwright.sync_api import sync_playwright
+import sys, json, argparse
+from playwright.async_api import TimeoutError as PlaywrightTimeout
+from browser_pool import run_task, run_batch, add_batch_arguments, read_queries
 
-search = input("What to search: ")
+URL = "https://ai-agent-mocha-pi.vercel.app/"
+ANSWER = ".justify-start"
 
-with sync_playwright() as p:
-    browser = p.chromium.launch(headless=False)   # headless=True for no UI
-    context = browser.new_context()                # like a clean profile
-    page = context.new_page()
-
-    page.goto("https://ai-agent-mocha-pi.vercel.app/")
 
+async def ask(page, query, timeout_ms=30000):
+    # the form is usable long before images and trackers finish loading
+    await page.goto(URL, wait_until="domcontentloaded")
 
     try:
-        page.fill("textarea", search)
+        await page.fill("textarea", query)
     except Exception:
         # sometimes the prompt might be a div[contenteditable] or different selector
         try:
-            page.fill("input[tag='textarea']", search)
+            await page.fill("input[tag='textarea']", query)
         except Exception:
             # last resort: use locator and type
             locator = page.locator("textarea[name='prompt-textarea'], input[name='prompt-textarea'], [contenteditable='true']")
-            locator.first.fill(search)
+            await locator.first.fill(query)
 
     # Click submit
-
+    before = await page.locator(ANSWER).count()
     try:
-        page.click("span:has-text('<<<')")
+        await page.click("span:has-text('<<<')")
     except Exception:
-        print("⚠️ Couldn't find submit button")
+        print("⚠️ Couldn't find submit button", file=sys.stderr)
+        return {"query": query, "submitted": False, "answer": None, "url": page.url}
+
+    # wait for a new answer bubble, then for the reply to stop streaming
+    answer = None
+    try:
+        await page.wait_for_function(
+            "([sel, n]) => document.querySelectorAll(sel).length > n", arg=[ANSWER, before], timeout=timeout_ms,
+        )
+        await page.wait_for_load_state("networkidle", timeout=timeout_ms)
+        answer = await page.locator(ANSWER).last.inner_text()
+    except PlaywrightTimeout:
+        print("⚠️ No answer before the timeout", file=sys.stderr)
+    return {"query": query, "submitted": True, "answer": answer, "url": page.url}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ask the agent site a question")
+    parser.add_argument("query", nargs="*", help="prompt to send (asked interactively if omitted); several run as a batch")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    parser.add_argument("--fast", action="store_true", help="block images, media, fonts and trackers")
+    add_batch_arguments(parser)
+    args = parser.parse_args()
+
+    queries = read_queries(args.batch) if args.batch else args.query
+    if len(queries) > 1 or args.batch:
+        jobs = [{"query": q} for q in queries]
+        sys.exit(1 if run_batch(ask, jobs, args.concurrency, args.timeout, args.retries, fast=args.fast) else 0)
 
-    # keep browser open a bit so you can see results
-    page.wait_for_timeout(3000)
-    browser.close()
+    query = queries[0] if queries else input("What to search: ")
+    print(json.dumps(run_task(ask, headless=not args.headed, fast=args.fast, query=query), ensure_ascii=False))
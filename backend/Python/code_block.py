@@ -0,0 +1,155 @@
+import re
+from reportlab.platypus.flowables import Flowable
+from reportlab.pdfbase.pdfmetrics import stringWidth, standardFonts
+from reportlab.lib.colors import HexColor
+import fonts
+
+# Code listings for pdf.py. A code block used to be one Paragraph with
+# &nbsp; for spaces and <br/> for newlines, which reportlab re-wraps from
+# the top on every page split. CodeBlock lays the listing out as rows of a
+# fixed-width grid instead:
+#
+#   - the font is monospace, so one advance width (measured once) gives
+#     every row's width; no per-word measuring
+#   - source lines longer than the frame are cut into continuation rows
+#     once per frame width
+#   - split() is an index into that row list, so a 5,000-line listing
+#     costs the same per page as a 50-line one and layout stays linear
+#
+# Rows are drawn through one text object per page. Characters the code font
+# can't encode go through the same fallback chain as paragraphs
+# (fonts.font_for_char), which only breaks the grid on those rows.
+
+PADDING = 4
+LINE_NUMBER_COLOR = HexColor("#9a9a9a")
+
+# what a standard (Latin-1) font can draw; anything else takes the slow path
+NEEDS_FALLBACK = re.compile(r"[^\x20-\x7e\xa0-\xff]")
+CONTROL = {cp: " " for cp in range(32) if cp != 10}
+
+
+class CodeRows:
+    """
+    A listing cut into rows for one frame width, shared by every piece of a
+    split. A row is (line index, column, text); the line number is shown
+    only on rows that start a line (column 0).
+    """
+
+    def __init__(self, lines, font, size, width, line_numbers, start=(0, 0)):
+        self.advance = stringWidth(" ", font, size)
+        self.gutter_digits = len(str(len(lines))) if line_numbers else 0
+        self.gutter = (self.gutter_digits + 1) * self.advance if line_numbers else 0
+        self.width = width
+        columns = max(1, int((width - 2 * PADDING - self.gutter) // self.advance))
+        self.rows = []
+        first, offset = start
+        for index in range(first, len(lines)):
+            line = lines[index]
+            col = offset if index == first else 0
+            self.rows.append((index, col, line[col:col + columns]))
+            for col in range(col + columns, len(line), columns):
+                self.rows.append((index, col, line[col:col + columns]))
+
+
+class CodeBlock(Flowable):
+    """
+    Monospace code listing that splits across pages row by row. `style` is
+    a ParagraphStyle (font, size, leading, spacing); line numbers go in a
+    grey gutter and are not repeated on continuation rows.
+    """
+
+    def __init__(self, text, style, line_numbers=False, tab_size=4):
+        super().__init__()
+        self.style = style
+        self.line_numbers = line_numbers
+        self.lines = text.expandtabs(tab_size).translate(CONTROL).split("\n")
+        self.layout = None
+        self.start, self.end = 0, None  # row range of this piece in layout
+
+    def _piece(self, start, end):
+        piece = CodeBlock.__new__(CodeBlock)
+        Flowable.__init__(piece)
+        piece.style, piece.line_numbers, piece.lines = self.style, self.line_numbers, self.lines
+        piece.layout, piece.start, piece.end = self.layout, start, end
+        return piece
+
+    def _layout_for(self, width):
+        layout = self.layout
+        if layout is None:
+            self.layout = CodeRows(self.lines, self.style.fontName, self.style.fontSize, width, self.line_numbers)
+            self.end = len(self.layout.rows)
+        elif layout.width != width:
+            # a continuation landing in a frame of another width: re-cut from
+            # where this piece starts (only happens with mixed frame widths)
+            start = layout.rows[self.start][:2]
+            stop = layout.rows[self.end][:2] if self.end < len(layout.rows) else None
+            self.layout = CodeRows(
+                self.lines, self.style.fontName, self.style.fontSize, width, self.line_numbers, start
+            )
+            self.start = 0
+            self.end = len(self.layout.rows) if stop is None else sum(1 for row in self.layout.rows if row[:2] < stop)
+        return self.layout
+
+    def wrap(self, availWidth, availHeight):
+        self._layout_for(availWidth)
+        self.width = availWidth
+        self.height = (self.end - self.start) * self.style.leading + 2 * PADDING
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        self._layout_for(availWidth)
+        fits = int((availHeight - 2 * PADDING) // self.style.leading)
+        if fits <= 0:
+            return []
+        if self.start + fits >= self.end:
+            return [self]
+        middle = self.start + fits
+        return [self._piece(self.start, middle), self._piece(middle, self.end)]
+
+    def getSpaceBefore(self):
+        return self.style.spaceBefore if self.start == 0 else 0
+
+    def getSpaceAfter(self):
+        return self.style.spaceAfter if self.end == len(self.layout.rows) else 0
+
+    def draw(self):
+        layout, style = self.layout, self.style
+        font, size = style.fontName, style.fontSize
+        standard = font in standardFonts
+        canv = self.canv
+        text = canv.beginText()
+        text.setFont(font, size, style.leading)
+        y = self.height - PADDING - size
+        code_x = PADDING + layout.gutter
+
+        for index, col, row in layout.rows[self.start:self.end]:
+            if self.line_numbers and col == 0:
+                text.setTextOrigin(PADDING, y)
+                text.setFillColor(LINE_NUMBER_COLOR)
+                text.textOut(str(index + 1).rjust(layout.gutter_digits))
+                text.setFillColor(style.textColor)
+            text.setTextOrigin(code_x, y)
+            if standard and NEEDS_FALLBACK.search(row):
+                self._draw_runs(text, row, font, size)
+            else:
+                text.textOut(row)
+            y -= style.leading
+
+        canv.drawText(text)
+
+    @staticmethod
+    def _draw_runs(text, row, font, size):
+        run, run_font = [], font
+        for ch in row:
+            ch_font = fonts.font_for_char(font, ch)
+            if ch_font != run_font and run:
+                text.textOut("".join(run))
+                run = []
+            if ch_font != run_font:
+                fonts.ensure_font(ch_font)
+                text.setFont(ch_font, size)
+                run_font = ch_font
+            run.append(ch)
+        text.textOut("".join(run))
+        if run_font != font:
+            text.setFont(font, size)
@@ -0,0 +1,226 @@
+import io, os, re, sys, json, mmap, struct, atexit, shutil, tempfile, argparse, functools
+
+# Offline emoji glyphs for pdf.py.
+#
+# The atlas is one binary file that can be mmapped as is:
+#   b"EMOJATL1" | uint32 index length | JSON index | PNG blobs
+# The index maps a codepoint key ("1f44d-1f3fd", FE0F dropped) to the
+# [offset, length] of its PNG, counted from the end of the index; keys whose
+# PNGs are identical point at the same blob.
+# Build it once with
+#   python Python/emoji_atlas.py --download            (Twemoji CDN)
+#   python Python/emoji_atlas.py --twemoji-dir DIR     (local Twemoji PNGs)
+#   python Python/emoji_atlas.py --font NotoColorEmoji.ttf
+
+__dirname = os.path.dirname(__file__)
+ATLAS_PATH = os.path.join(__dirname, "emoji_atlas.bin")
+EMOJI_LIST = os.path.join(__dirname, "emojis_full.json")
+TWEMOJI_URL = "https://cdnjs.cloudflare.com/ajax/libs/twemoji/14.0.2/72x72/{}.png"
+MAGIC = b"EMOJATL1"
+GLYPH_SIZE = 72
+
+
+def emoji_key(emoji):
+    return "-".join(f"{ord(c):x}" for c in emoji if c != "\ufe0f")
+
+
+class EmojiAtlas:
+    def __init__(self, path=ATLAS_PATH):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:8] != MAGIC:
+            raise ValueError(f"{path} is not an emoji atlas")
+        (index_len,) = struct.unpack_from("<I", self._mm, 8)
+        self.index = json.loads(self._mm[12:12 + index_len])["glyphs"]
+        self._data_start = 12 + index_len
+        self._glyph_dir = None
+        self.pattern = self._build_pattern()
+
+    def _build_pattern(self):
+        # longest sequences first so ZWJ/skin-tone sequences beat their parts;
+        # FE0F is optional after every codepoint since the keys drop it
+        sequences = sorted(self.index, key=len, reverse=True)
+        alternatives = [
+            "".join(re.escape(chr(int(cp, 16))) + "\ufe0f?" for cp in key.split("-"))
+            for key in sequences
+        ]
+        return re.compile("|".join(alternatives)) if alternatives else None
+
+    def png(self, key):
+        offset, length = self.index[key]
+        start = self._data_start + offset
+        return self._mm[start:start + length]
+
+    # Each glyph is sliced out of the map and materialized at most once per
+    # process, as a file reportlab can open by name (data: URIs would need
+    # rl_config.trustedHosts). reportlab then embeds it once per document.
+    # Files are named by blob offset, so keys sharing a blob (build_atlas
+    # stores identical PNGs once) share one image in the PDF too. px
+    # downscales the glyph (pdf.py's compact profile).
+    def glyph_path(self, key, px=None):
+        offset, length = self.index[key]
+        return self._blob_path(offset, length, px)
+
+    @functools.lru_cache(maxsize=1024)
+    def _blob_path(self, offset, length, px):
+        if self._glyph_dir is None:
+            self._glyph_dir = tempfile.mkdtemp(prefix="emoji-glyphs-")
+            atexit.register(shutil.rmtree, self._glyph_dir, True)
+        start = self._data_start + offset
+        png = self._mm[start:start + length]
+        if px:
+            png = downscale_png(png, px)
+        path = os.path.join(self._glyph_dir, f"{offset}@{px}.png" if px else f"{offset}.png")
+        with open(path, "wb") as f:
+            f.write(png)
+        return path
+
+    def markup(self, text, size, px=None):
+        """Replace emoji in paragraph markup with inline <img/> tags."""
+        if self.pattern is None or text.isascii():
+            return text
+
+        def to_img(m):
+            key = emoji_key(m.group())
+            return f'<img src="{self.glyph_path(key, px)}" width="{size}" height="{size}" valign="middle"/>'
+
+        return self.pattern.sub(to_img, text)
+
+
+def downscale_png(png, px):
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(png))
+    if image.width <= px:
+        return png
+    out = io.BytesIO()
+    image.resize((px, round(image.height * px / image.width)), Image.LANCZOS).save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+_atlas = None
+
+
+# None when no atlas has been built; callers then keep the plain text
+def get_atlas():
+    global _atlas
+    if _atlas is None and os.path.exists(ATLAS_PATH):
+        _atlas = EmojiAtlas(ATLAS_PATH)
+    return _atlas
+
+
+def load_emoji_list(path=EMOJI_LIST):
+    with open(path, encoding="utf-8") as f:
+        groups = json.load(f)
+    return [entry["emoji"] for entries in groups.values() for entry in entries]
+
+
+def twemoji_names(key):
+    # Twemoji drops FE0F from most file names but keeps it in a few
+    yield key
+    yield key.replace("-", "-fe0f-", 1) if "-" in key else f"{key}-fe0f"
+
+
+def png_from_dir(directory, key):
+    for name in twemoji_names(key):
+        path = os.path.join(directory, f"{name}.png")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read()
+    return None
+
+
+def png_from_cdn(key):
+    import urllib.request  # only --build fetches; keeps it off pdf.py's startup
+
+    for name in twemoji_names(key):
+        try:
+            with urllib.request.urlopen(TWEMOJI_URL.format(name), timeout=10) as resp:
+                return resp.read()
+        except OSError:
+            continue
+    return None
+
+
+def png_from_font(font, emoji):
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGBA", (GLYPH_SIZE * 2, GLYPH_SIZE * 2), (0, 0, 0, 0))
+    ImageDraw.Draw(image).text((0, 0), emoji, font=font, embedded_color=True, fill="black")
+    box = image.getbbox()
+    if box is None:
+        return None
+    image = image.crop(box).resize((GLYPH_SIZE, GLYPH_SIZE))
+    out = io.BytesIO()
+    image.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+def build_atlas(emojis, fetch, out_path=ATLAS_PATH):
+    blobs, index, missing = [], {}, []
+    seen = {}  # PNG bytes -> blob number: identical glyphs are stored once
+    for emoji in emojis:
+        key = emoji_key(emoji)
+        if key in index:
+            continue
+        png = fetch(emoji, key)
+        if not png:
+            missing.append(emoji)
+            continue
+        if png not in seen:
+            seen[png] = len(blobs)
+            blobs.append(png)
+        index[key] = seen[png]
+
+    # offsets are relative to the first blob, right after the index
+    offsets, offset = [], 0
+    for blob in blobs:
+        offsets.append(offset)
+        offset += len(blob)
+    glyphs = {key: [offsets[n], len(blobs[n])] for key, n in index.items()}
+    header = json.dumps({"size": GLYPH_SIZE, "glyphs": glyphs}).encode()
+
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, out_path)
+    return {
+        "glyphs": len(glyphs), "unique_images": len(blobs), "missing": missing,
+        "bytes": 12 + len(header) + offset, "path": out_path,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline emoji atlas used by pdf.py")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--download", action="store_true", help="fetch Twemoji 72x72 PNGs from the CDN (once)")
+    source.add_argument("--twemoji-dir", help="directory of Twemoji PNGs named <codepoints>.png")
+    source.add_argument("--font", help="color emoji TTF to rasterize with Pillow")
+    parser.add_argument("--emojis", default=EMOJI_LIST, help="emoji list JSON (default: emojis_full.json)")
+    parser.add_argument("--out", default=ATLAS_PATH)
+    args = parser.parse_args()
+
+    if args.download:
+        fetch = lambda emoji, key: png_from_cdn(key)
+    elif args.twemoji_dir:
+        fetch = lambda emoji, key: png_from_dir(args.twemoji_dir, key)
+    else:
+        from PIL import ImageFont
+        # bitmap color fonts (Noto) only rasterize at their native size
+        try:
+            font = ImageFont.truetype(args.font, 109)
+        except OSError:
+            font = ImageFont.truetype(args.font, GLYPH_SIZE)
+        fetch = lambda emoji, key: png_from_font(font, emoji)
+
+    result = build_atlas(load_emoji_list(args.emojis), fetch, args.out)
+    print(json.dumps(result, ensure_ascii=False))
+    sys.exit(0 if result["glyphs"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import os
+from urllib.parse import urlsplit
+
+# Fast navigation for BrowserPool contexts: requests the automation never
+# looks at are aborted at the route level before they hit the network.
+#
+#   BROWSER_BLOCK_TYPES    resource types to drop (default image,media,font)
+#   BROWSER_BLOCK_DOMAINS  extra domains to drop, on top of TRACKER_DOMAINS
+#
+# Stylesheets are kept: without them elements can be laid out invisible and
+# Playwright's actionability checks would stall clicks.
+
+BLOCK_TYPES = frozenset(
+    t.strip() for t in (os.getenv("BROWSER_BLOCK_TYPES") or "image,media,font").split(",") if t.strip()
+)
+
+TRACKER_DOMAINS = (
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com",
+    "google-analytics.com", "googletagmanager.com", "googletagservices.com",
+    "adservice.google.com", "facebook.net", "connect.facebook.net",
+    "hotjar.com", "segment.io", "segment.com", "mixpanel.com",
+    "clarity.ms", "scorecardresearch.com", "quantserve.com", "criteo.com",
+    "taboola.com", "outbrain.com", "adnxs.com", "amazon-adsystem.com",
+)
+
+BLOCK_DOMAINS = TRACKER_DOMAINS + tuple(
+    d.strip().lower() for d in (os.getenv("BROWSER_BLOCK_DOMAINS") or "").split(",") if d.strip()
+)
+
+
+def blocked_host(host, domains=BLOCK_DOMAINS):
+    host = (host or "").lower()
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class RequestBlocker:
+    """Route handler that aborts unwanted requests and counts what it did."""
+
+    def __init__(self, types=BLOCK_TYPES, domains=BLOCK_DOMAINS):
+        self.types = frozenset(types)
+        self.domains = tuple(domains)
+        self.blocked = 0
+        self.allowed = 0
+
+    async def __call__(self, route):
+        request = route.request
+        if request.resource_type in self.types or blocked_host(urlsplit(request.url).hostname, self.domains):
+            self.blocked += 1
+            await route.abort("blockedbyclient")
+        else:
+            self.allowed += 1
+            await route.continue_()
+
+
+async def enable(context, types=BLOCK_TYPES, domains=BLOCK_DOMAINS):
+    """Install a RequestBlocker on every page of the context; returns it."""
+    blocker = RequestBlocker(types, domains)
+    await context.route("**/*", blocker)
+    return blocker
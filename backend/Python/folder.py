@@ -1,36 +1,60 @@
+import sys, json, asyncio, argparse
+from playwright.async_api import TimeoutError as PlaywrightTimeout
+from browser_pool import run_task, run_batch, add_batch_arguments, read_queries
 
-from playwright.sync_api import sync_playwright
+URL = "https://www.youtube.com/"
+RESULT_TITLES = "ytd-video-renderer a#video-title"
 
-search = input("What to search: ")
-
-with sync_playwright() as p:
-    browser = p.chromium.launch(headless=False)   # headless=True for no UI
-    context = browser.new_context()                # like a clean profile
-    page = context.new_page()
-
-    page.goto("https://www.youtube.com/")
 
+async def search_youtube(page, query, limit=10, timeout_ms=30000, wait_for_quit=False):
+    # the search box is usable long before thumbnails and trackers finish
+    await page.goto(URL, wait_until="domcontentloaded")
 
     try:
-        page.fill('.ytSearchboxComponentInput',search)
+        await page.fill('.ytSearchboxComponentInput', query)
     except Exception:
-        print("error")
-        # sometimes the prompt might be a div[contenteditable] or different selector
-        # try:
-        #     page.fill("input[tag='textarea']", search)
-        # except Exception:
-        #     # last resort: use locator and type
-        #     locator = page.locator("textarea[name='prompt-textarea'], input[name='prompt-textarea'], [contenteditable='true']")
-        #     locator.first.fill(search)
+        print("error", file=sys.stderr)
 
     # Click submit
-
+    submitted = True
     try:
-        page.click(".ytSearchboxComponentSearchButton")
-        print("clicckkk")
+        await page.click(".ytSearchboxComponentSearchButton")
     except Exception:
-        print("⚠️ Couldn't find submit button")
-
-    # keep browser open a bit so you can see results
-    input("Quit: ")
-    browser.close()
+        print("⚠️ Couldn't find submit button", file=sys.stderr)
+        submitted = False
+
+    results = []
+    if submitted:
+        try:
+            await page.wait_for_selector(RESULT_TITLES, timeout=timeout_ms)
+            titles = page.locator(RESULT_TITLES)
+            for i in range(min(limit, await titles.count())):
+                link = titles.nth(i)
+                results.append({
+                    "title": (await link.inner_text()).strip(),
+                    "url": await link.get_attribute("href"),
+                })
+        except PlaywrightTimeout:
+            print("⚠️ No results before the timeout", file=sys.stderr)
+
+    if wait_for_quit:
+        # headed runs: keep the browser open until the user is done looking
+        await asyncio.to_thread(input, "Quit: ")
+    return {"query": query, "submitted": submitted, "results": results, "url": page.url}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search YouTube")
+    parser.add_argument("query", nargs="*", help="search terms (asked interactively if omitted); several run as a batch")
+    parser.add_argument("--headed", action="store_true", help="show the browser and wait for Enter before closing")
+    parser.add_argument("--fast", action="store_true", help="block images, media, fonts and trackers")
+    add_batch_arguments(parser)
+    args = parser.parse_args()
+
+    queries = read_queries(args.batch) if args.batch else args.query
+    if len(queries) > 1 or args.batch:
+        jobs = [{"query": q} for q in queries]
+        sys.exit(1 if run_batch(search_youtube, jobs, args.concurrency, args.timeout, args.retries, fast=args.fast) else 0)
+
+    query = queries[0] if queries else input("What to search: ")
+    print(json.dumps(run_task(search_youtube, headless=not args.headed, fast=args.fast, query=query, wait_for_quit=args.headed), ensure_ascii=False))
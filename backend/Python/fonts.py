@@ -0,0 +1,321 @@
+import os, re, json, bisect, contextlib
+from struct import pack, unpack
+import tracing
+
+# Lazy font manager for pdf.py.
+#
+# Nothing is parsed at import (reportlab itself isn't even imported): families
+# are only *named* here, and a TTF is registered with reportlab the first
+# time a paragraph actually needs it.
+# Text outside the base font's coverage is split into runs and wrapped in
+# <font face="..."> using the first font in FALLBACK_CHAIN that has the
+# glyph. Coverage comes from a codepoint-range index cached on disk, so the
+# choice of fonts never requires parsing a font the document doesn't use.
+
+__dirname = os.path.dirname(__file__)
+DEJAVU_DIR = os.path.join(__dirname, "dejavu-sans")
+INDEX_PATH = os.getenv("FONT_INDEX_PATH") or os.path.join(__dirname, ".font_coverage.json")
+
+FONT_FILES = {
+    "DejaVuSans": os.path.join(__dirname, "DejaVuSans.ttf"),
+    "DejaVuSans-Bold": os.path.join(DEJAVU_DIR, "DejaVuSans-Bold.ttf"),
+    "DejaVuSans-Oblique": os.path.join(DEJAVU_DIR, "DejaVuSans-Oblique.ttf"),
+    "DejaVuSans-BoldOblique": os.path.join(DEJAVU_DIR, "DejaVuSans-BoldOblique.ttf"),
+    "DejaVuSansCondensed": os.path.join(DEJAVU_DIR, "DejaVuSansCondensed.ttf"),
+    "DejaVuSansCondensed-Bold": os.path.join(DEJAVU_DIR, "DejaVuSansCondensed-Bold.ttf"),
+    "DejaVuSansCondensed-Oblique": os.path.join(DEJAVU_DIR, "DejaVuSansCondensed-Oblique.ttf"),
+    "DejaVuSansCondensed-BoldOblique": os.path.join(DEJAVU_DIR, "DejaVuSansCondensed-BoldOblique.ttf"),
+    # Segoe UI Emoji on Windows, or any emoji TTF via EMOJI_FONT
+    "Emoji": os.getenv("EMOJI_FONT") or os.path.join(__dirname, "seguiemj.ttf"),
+}
+
+# family -> (normal, bold, italic, boldItalic)
+FAMILIES = {
+    "DejaVuSans": ("DejaVuSans", "DejaVuSans-Bold", "DejaVuSans-Oblique", "DejaVuSans-BoldOblique"),
+    "DejaVuSansCondensed": (
+        "DejaVuSansCondensed", "DejaVuSansCondensed-Bold",
+        "DejaVuSansCondensed-Oblique", "DejaVuSansCondensed-BoldOblique",
+    ),
+    "Emoji": ("Emoji",) * 4,
+}
+
+FALLBACK_CHAIN = ["DejaVuSans", "DejaVuSansCondensed", "Emoji"]
+
+# reportlab's built-in fonts only encode (roughly) Latin-1
+STANDARD_COVERAGE = [[32, 126], [160, 255]]
+
+NON_ASCII = re.compile(r"[^\x00-\x7f]+")
+
+
+def available(name):
+    return name in FONT_FILES and os.path.exists(FONT_FILES[name])
+
+
+def default_family():
+    return "DejaVuSans" if available("DejaVuSans") else "Helvetica"
+
+
+_registered = set()
+_family_mapped = set()
+
+
+def ensure_font(name):
+    """Register a font (and its family mapping) with reportlab on first use."""
+    if name in _registered:
+        return
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.lib.fonts import addMapping
+
+    if name in pdfmetrics.standardFonts:
+        return
+    with tracing.span("fonts", bytes=os.path.getsize(FONT_FILES[name])):
+        pdfmetrics.registerFont(TTFont(name, FONT_FILES[name]))
+    _registered.add(name)
+
+    for family, variants in FAMILIES.items():
+        if name in variants and family not in _family_mapped:
+            # mapping is just names; the variant TTFs still load lazily
+            for (bold, italic), variant in zip(((0, 0), (1, 0), (0, 1), (1, 1)), variants):
+                addMapping(family, bold, italic, variant)
+            _family_mapped.add(family)
+
+
+def ensure_variants(name, bold, italic):
+    ensure_font(name)
+    family = FAMILIES.get(name)
+    if family:
+        for flag, variant in zip((bold, italic, bold and italic), family[1:]):
+            if flag:
+                ensure_font(variant)
+
+
+def registered_fonts():
+    return sorted(_registered)
+
+
+# Lean subsets for pdf.py's "compact" profile. reportlab copies a font's
+# name table and hinting into every subset; for DejaVu that is 15 KB of
+# license text in `name`, plus the cvt/fpgm/prep programs and per-glyph
+# instructions, which viewers only run to grid-fit small text on screen.
+# slim_subsets() keeps the name records that identify the font and drops
+# the hinting, repacking glyf and loca around the shorter glyphs.
+NAME_IDS = (1, 2, 3, 4, 5, 6)  # family, style, unique id, full name, version, PostScript name
+HINTING_TABLES = ("cvt ", "fpgm", "prep")
+# simple glyph point flags
+X_SHORT, Y_SHORT, REPEAT, X_SAME, Y_SAME = 0x02, 0x04, 0x08, 0x10, 0x20
+# composite glyph component flags
+ARG_WORDS, HAS_SCALE, HAS_XY_SCALE, HAS_2X2, MORE_COMPONENTS, HAS_INSTRUCTIONS = (
+    0x0001, 0x0008, 0x0040, 0x0080, 0x0020, 0x0100
+)
+
+
+def slim_name_table(data):
+    count, string_offset = unpack(">HH", data[2:6])
+    records, strings = [], bytearray()
+    for i in range(count):
+        platform, encoding, language, name_id, length, offset = unpack(">6H", data[6 + 12 * i:18 + 12 * i])
+        if name_id in NAME_IDS:
+            records.append(pack(">6H", platform, encoding, language, name_id, length, len(strings)))
+            strings += data[string_offset + offset:string_offset + offset + length]
+    return pack(">3H", 0, len(records), 6 + 12 * len(records)) + b"".join(records) + bytes(strings)
+
+
+def strip_instructions(glyph):
+    """The glyph without its hinting instructions."""
+    contours = unpack(">h", glyph[:2])[0]
+    if contours >= 0:
+        at = 10 + 2 * contours
+        points = unpack(">H", glyph[at - 2:at])[0] + 1 if contours else 0
+        length = unpack(">H", glyph[at:at + 2])[0]
+        body = glyph[at + 2 + length:]
+        # flags, then the coordinates they size; what follows is padding,
+        # which the caller redoes for the new length
+        i = coords = 0
+        while points > 0:
+            flag, i = body[i], i + 1
+            repeat = 1
+            if flag & REPEAT:
+                repeat, i = 1 + body[i], i + 1
+            x = 1 if flag & X_SHORT else 0 if flag & X_SAME else 2
+            y = 1 if flag & Y_SHORT else 0 if flag & Y_SAME else 2
+            coords += repeat * (x + y)
+            points -= repeat
+        return glyph[:at] + b"\0\0" + body[:i + coords]
+    # composite: instructions follow the last component
+    glyph, at, flags = bytearray(glyph), 10, MORE_COMPONENTS
+    hinted = False
+    while flags & MORE_COMPONENTS:
+        flags = unpack(">H", glyph[at:at + 2])[0]
+        hinted |= bool(flags & HAS_INSTRUCTIONS)
+        glyph[at:at + 2] = pack(">H", flags & ~HAS_INSTRUCTIONS)
+        at += 4 + (4 if flags & ARG_WORDS else 2)
+        at += 2 if flags & HAS_SCALE else 4 if flags & HAS_XY_SCALE else 8 if flags & HAS_2X2 else 0
+    return bytes(glyph[:at] if hinted else glyph)
+
+
+_slim_maker = None
+
+
+@contextlib.contextmanager
+def slim_subsets():
+    """Embed lean subsets (see above) for documents built inside the block."""
+    global _slim_maker
+    from reportlab.pdfbase import ttfonts
+
+    if _slim_maker is None:
+        class SlimFontMaker(ttfonts.TTFontMaker):
+            def makeStream(self):
+                tables = self.tables
+                for tag in HINTING_TABLES:
+                    tables.pop(tag, None)
+                if "name" in tables:
+                    tables["name"] = slim_name_table(tables["name"])
+                head, loca, glyf = tables["head"], tables["loca"], tables["glyf"]
+                if unpack(">h", head[50:52])[0]:
+                    offsets = unpack(f">{len(loca) // 4}L", loca)
+                else:
+                    offsets = [2 * o for o in unpack(f">{len(loca) // 2}H", loca)]
+                glyphs, new_offsets, pos = [], [], 0
+                for start, end in zip(offsets, offsets[1:]):
+                    glyph = strip_instructions(glyf[start:end]) if end > start else b""
+                    glyph += b"\0" * (-len(glyph) % 4)  # glyphs stay 4-byte aligned
+                    new_offsets.append(pos)
+                    glyphs.append(glyph)
+                    pos += len(glyph)
+                new_offsets.append(pos)
+                tables["glyf"] = b"".join(glyphs)
+                # the glyphs only shrank, so the short format still fits if it did
+                if unpack(">h", head[50:52])[0]:
+                    tables["loca"] = pack(f">{len(new_offsets)}L", *new_offsets)
+                else:
+                    tables["loca"] = pack(f">{len(new_offsets)}H", *(o >> 1 for o in new_offsets))
+                return super().makeStream()
+
+        _slim_maker = SlimFontMaker
+
+    # makeSubset looks TTFontMaker up when the document is saved
+    previous, ttfonts.TTFontMaker = ttfonts.TTFontMaker, _slim_maker
+    try:
+        yield
+    finally:
+        ttfonts.TTFontMaker = previous
+
+
+class CoverageIndex:
+    """Codepoint ranges per font, parsed once and cached in INDEX_PATH."""
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self._ranges = {}
+        self._starts = {}
+        try:
+            with open(path) as f:
+                self._disk = json.load(f)
+        except (OSError, ValueError):
+            self._disk = {}
+
+    def _load(self, name):
+        from reportlab.pdfbase import pdfmetrics
+
+        if name in pdfmetrics.standardFonts or not available(name):
+            ranges = STANDARD_COVERAGE if name in pdfmetrics.standardFonts else []
+        else:
+            font_path = FONT_FILES[name]
+            stamp = [font_path, os.path.getsize(font_path), os.stat(font_path).st_mtime_ns]
+            entry = self._disk.get(name)
+            if entry and entry["stamp"] == stamp:
+                ranges = entry["ranges"]
+            else:
+                ranges = self._scan(font_path)
+                self._disk[name] = {"stamp": stamp, "ranges": ranges}
+                self._save()
+        self._ranges[name] = ranges
+        self._starts[name] = [r[0] for r in ranges]
+
+    @staticmethod
+    def _scan(font_path):
+        from reportlab.pdfbase.ttfonts import TTFontFile
+
+        ranges = []
+        for cp in sorted(TTFontFile(font_path).charToGlyph):
+            if ranges and ranges[-1][1] == cp - 1:
+                ranges[-1][1] = cp
+            else:
+                ranges.append([cp, cp])
+        return ranges
+
+    def _save(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self._disk, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # read-only checkout: keep the index in memory only
+
+    def covers(self, name, cp):
+        if name not in self._ranges:
+            self._load(name)
+        i = bisect.bisect_right(self._starts[name], cp) - 1
+        return i >= 0 and cp <= self._ranges[name][i][1]
+
+
+_index = None
+_choice = {}
+
+
+def coverage_index():
+    global _index
+    if _index is None:
+        _index = CoverageIndex()
+    return _index
+
+
+def font_for_char(base, ch):
+    key = (base, ch)
+    if key not in _choice:
+        index = coverage_index()
+        cp = ord(ch)
+        choice = base
+        if not index.covers(base, cp):
+            for name in FALLBACK_CHAIN:
+                if name != base and available(name) and index.covers(name, cp):
+                    choice = name
+                    break
+        _choice[key] = choice
+    return _choice[key]
+
+
+def apply_fallback(markup, base):
+    """
+    Wrap runs the base font can't draw in <font face> tags for the first
+    fallback font that can, and register every font the markup will use.
+    """
+    bold, italic = "<b>" in markup, "<i>" in markup
+    ensure_variants(base, bold, italic)
+    if markup.isascii():
+        return markup
+
+    def wrap(chars, font):
+        text = "".join(chars)
+        if font == base:
+            return text
+        ensure_variants(font, bold, italic)
+        return f'<font face="{font}">{text}</font>'
+
+    def split_runs(m):
+        out = []
+        run, run_font = [], base
+        for ch in m.group():
+            font = font_for_char(base, ch)
+            if font != run_font and run:
+                out.append(wrap(run, run_font))
+                run = []
+            run.append(ch)
+            run_font = font
+        out.append(wrap(run, run_font))
+        return "".join(out)
+
+    # tags and entities are ASCII, so only text runs are ever rewritten
+    return NON_ASCII.sub(split_runs, markup)
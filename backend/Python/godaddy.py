@@ -1,30 +1,72 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-
-def godaddy_login():
-    # Path to chromedriver
-    service = Service("C:/Program Files (x86)/chromedriver-win64/chromedriver.exe")
-
-    options = Options()
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option("detach", True)  # Keep Chrome open after script ends
-    options.add_argument("--start-maximized")        # Maximize window
-    # options.add_argument("--headless")             # <-- REMOVE headless if present
-
-    chrome = webdriver.Chrome(service=service, options=options)
-    chrome.get("https://sso.godaddy.com/?app=dcc&path=%2Fcontrol%2Fportfolio%3Fplid%3D")
-
-    username = chrome.find_element(By.ID, "username")
-    username.send_keys("188797785")
-    password = chrome.find_element(By.ID, "password")
-    password.send_keys("loremipsum208")
-    submit = chrome.find_element(By.ID, "submitBtn")
-    submit.click()
-
-    print("✅ GoDaddy login script executed, Chrome should be visible now!")
-    input("Press Enter to quit and close Chrome...")  # keep tab open until you press Enter
+import os, json, asyncio, argparse
+from dotenv import load_dotenv
+
+# Load .env from backend directory, before browser_pool and session_cache read it
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+from playwright.async_api import TimeoutError as PlaywrightTimeout
+from browser_pool import run_task
+import session_cache
+
+LOGIN_URL = "https://sso.godaddy.com/?app=dcc&path=%2Fcontrol%2Fportfolio%3Fplid%3D"
+SSO_HOST = "https://sso.godaddy.com"
+
+
+def off_sso(url):
+    return not url.startswith(SSO_HOST)
+
+
+async def sso_outcome(page, timeout_ms):
+    """With a saved session SSO forwards straight on; an expired one shows the form."""
+    left = asyncio.ensure_future(page.wait_for_url(off_sso, timeout=timeout_ms))
+    form = asyncio.ensure_future(page.wait_for_selector("#username", timeout=timeout_ms))
+    done, pending = await asyncio.wait({left, form}, return_when=asyncio.FIRST_COMPLETED)
+    for waiter in pending:
+        waiter.cancel()
+    await asyncio.gather(left, form, return_exceptions=True)
+    return off_sso(page.url)
+
+
+async def godaddy_login(page, username=None, password=None, timeout_ms=30000, wait_for_quit=False, fresh=False):
+    username = username or os.getenv("GODADDY_USERNAME")
+    password = password or os.getenv("GODADDY_PASSWORD")
+    if not username or not password:
+        return {"error": "Missing GODADDY_USERNAME or GODADDY_PASSWORD in .env"}
+
+    await page.goto(LOGIN_URL, wait_until="domcontentloaded")
+    if session_cache.restored(page.context) and await sso_outcome(page, timeout_ms):
+        result = {"logged_in": True, "url": page.url, "session": "cached"}
+    else:
+        await page.fill("#username", username)
+        await page.fill("#password", password)
+        await page.click("#submitBtn")
+
+        # a successful login redirects off the SSO host; staying there means it didn't go through
+        try:
+            await page.wait_for_url(off_sso, timeout=timeout_ms)
+        except PlaywrightTimeout:
+            pass
+        result = {"logged_in": off_sso(page.url), "url": page.url, "session": "new"}
+        if result["logged_in"]:
+            await session_cache.remember(page.context)
+        else:
+            session_cache.forget(page.context)
+    if wait_for_quit:
+        await asyncio.to_thread(input, "Press Enter to quit and close Chrome...")
+    return result
+
+
+def godaddy_session(username=None, fresh=False, **params):
+    return None if fresh else ("godaddy", username or os.getenv("GODADDY_USERNAME"))
+
+
+godaddy_login.session = godaddy_session
+
 
 if __name__ == "__main__":
-    godaddy_login()
+    parser = argparse.ArgumentParser(description="Log in to GoDaddy")
+    parser.add_argument("--headed", action="store_true", help="show the browser and keep it open until Enter")
+    parser.add_argument("--fast", action="store_true", help="block images, media, fonts and trackers")
+    parser.add_argument("--fresh", action="store_true", help="ignore the saved session and log in again")
+    args = parser.parse_args()
+    print(json.dumps(run_task(godaddy_login, headless=not args.headed, fast=args.fast, wait_for_quit=args.headed, fresh=args.fresh)))
@@ -0,0 +1,146 @@
+import os, json, sqlite3
+
+# SQLite FTS5 index over Keep notes for keep_ops.py's search op.
+#
+# notes holds one row per note: a change signature, the filter columns
+# and the rowid of its entry in notes_fts (title, text, labels). refresh()
+# only runs when the Keep tree has synced to a new keep_version, and then
+# only re-tokenizes notes whose signature moved, so after the first build
+# a search costs one SQL query rather than a walk over every note.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS notes (
+    id TEXT PRIMARY KEY,
+    fts_rowid INTEGER NOT NULL,
+    signature TEXT NOT NULL,
+    archived INTEGER NOT NULL,
+    trashed INTEGER NOT NULL,
+    labels TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS notes_fts_rowid ON notes (fts_rowid);
+CREATE INDEX IF NOT EXISTS notes_updated ON notes (updated);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(title, text, labels, tokenize='unicode61 remove_diacritics 2');
+"""
+
+# bm25 column weights: a hit in the title or a label counts for more than body text
+RANK = "bm25(notes_fts, 10.0, 1.0, 5.0)"
+
+MAX_LIMIT = 100
+
+
+def signature(note, labels):
+    updated = note.timestamps.updated.timestamp() if note.timestamps.updated else 0
+    return json.dumps([updated, note.archived, note.trashed, labels])
+
+
+def match_expression(query):
+    # every word becomes a quoted prefix term (implicit AND), so user input
+    # can't trip over FTS5 query syntax
+    terms = ['"' + word.replace('"', '""') + '"*' for word in query.split()]
+    return " ".join(terms)
+
+
+class NoteIndex:
+    def __init__(self, path):
+        if path != ":memory:" and not os.path.exists(path):
+            # the index holds note contents: owner-only like the state file
+            os.close(os.open(path, os.O_WRONLY | os.O_CREAT, 0o600))
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def version(self):
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'keep_version'").fetchone()
+        return row[0] if row else None
+
+    def refresh(self, keep, version):
+        if version is not None and version == self.version():
+            return 0
+
+        known = {row[0]: (row[1], row[2]) for row in self.db.execute("SELECT id, signature, fts_rowid FROM notes")}
+        changed = 0
+        with self.db:
+            for note in keep.all():
+                labels = [label.name for label in note.labels.all()]
+                sig = signature(note, labels)
+                old = known.pop(note.id, None)
+                if old and old[0] == sig:
+                    continue
+                if old:
+                    self.db.execute("DELETE FROM notes_fts WHERE rowid = ?", (old[1],))
+                rowid = self.db.execute(
+                    "INSERT INTO notes_fts (title, text, labels) VALUES (?, ?, ?)",
+                    (note.title, note.text, " ".join(labels)),
+                ).lastrowid
+                self.db.execute(
+                    "INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (note.id, rowid, sig, note.archived, note.trashed, json.dumps(labels), json.loads(sig)[0]),
+                )
+                changed += 1
+
+            # whatever is left no longer exists in Keep
+            for note_id, (_, rowid) in known.items():
+                self.db.execute("DELETE FROM notes_fts WHERE rowid = ?", (rowid,))
+                self.db.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+                changed += 1
+
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('keep_version', ?)", (version,))
+        return changed
+
+    def search(self, query="", label=None, archived=None, trashed=False, limit=20, offset=0):
+        """
+        Ranked search over title, text and labels. archived/trashed filter on
+        that state when True/False and match either when None; with an empty
+        query the filtered notes come back most recently updated first.
+        """
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        offset = max(0, int(offset))
+        where, args = [], []
+        if archived is not None:
+            where.append("n.archived = ?")
+            args.append(bool(archived))
+        if trashed is not None:
+            where.append("n.trashed = ?")
+            args.append(bool(trashed))
+        if label:
+            where.append("EXISTS (SELECT 1 FROM json_each(n.labels) WHERE lower(value) = lower(?))")
+            args.append(label)
+
+        expression = match_expression(query or "")
+        if expression:
+            source = "notes_fts JOIN notes n ON n.fts_rowid = notes_fts.rowid"
+            where.insert(0, "notes_fts MATCH ?")
+            args.insert(0, expression)
+            columns = f"n.id, notes_fts.title, snippet(notes_fts, 1, '[', ']', '…', 16), n.labels, n.archived, n.trashed, {RANK}"
+            order = RANK
+        else:
+            source = "notes n JOIN notes_fts ON notes_fts.rowid = n.fts_rowid"
+            columns = "n.id, notes_fts.title, substr(notes_fts.text, 1, 120), n.labels, n.archived, n.trashed, 0"
+            order = "n.updated DESC"
+        clause = " WHERE " + " AND ".join(where) if where else ""
+
+        total = self.db.execute(f"SELECT count(*) FROM {source}{clause}", args).fetchone()[0]
+        rows = self.db.execute(
+            f"SELECT {columns} FROM {source}{clause} ORDER BY {order} LIMIT ? OFFSET ?",
+            args + [limit, offset],
+        ).fetchall()
+
+        results = [
+            {
+                "id": note_id,
+                "title": title,
+                "snippet": snippet,
+                "labels": json.loads(labels),
+                "archived": bool(is_archived),
+                "trashed": bool(is_trashed),
+                "score": round(-score, 4),
+            }
+            for note_id, title, snippet, labels, is_archived, is_trashed, score in rows
+        ]
+        next_offset = offset + len(results)
+        return {
+            "results": results,
+            "total": total,
+            "next_offset": next_offset if next_offset < total else None,
+        }
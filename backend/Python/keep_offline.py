@@ -0,0 +1,85 @@
+import os, json, time, random, threading
+
+# Offline stand-in for Google's Keep sync endpoint, for load tests and
+# benchmarks of keep_ops.py (KEEP_BACKEND=offline).
+#
+# Only the transport is replaced: OfflineKeepAPI answers gkeepapi's
+# changes() call the way the server does (store the dirty nodes sent up,
+# return everything newer than the client's version), so the real Keep
+# client, node objects, state snapshot and search index all run unchanged.
+#
+#   KEEP_OFFLINE_LATENCY_MS   simulated round trip per changes() call (default 0)
+#   KEEP_OFFLINE_JITTER_MS    uniform random extra latency (default 0)
+#   KEEP_OFFLINE_STORE        JSON file the account lives in; in memory when unset,
+#                             so only a resident --serve process keeps it
+
+
+class OfflineKeepAPI:
+    def __init__(self, store_path=None, latency_ms=0.0, jitter_ms=0.0):
+        self.store_path = store_path
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.version = 0
+        self.nodes = {}   # id -> [version, raw node]
+        self.labels = []
+        self.labels_version = 0
+        self._load()
+
+    def _load(self):
+        if not self.store_path or not os.path.exists(self.store_path):
+            return
+        with open(self.store_path) as f:
+            data = json.load(f)
+        self.version = data["version"]
+        self.nodes = data["nodes"]
+        self.labels = data["labels"]
+        self.labels_version = data["labels_version"]
+
+    def _save(self):
+        if not self.store_path:
+            return
+        tmp = f"{self.store_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(json.dumps({
+                "version": self.version, "nodes": self.nodes,
+                "labels": self.labels, "labels_version": self.labels_version,
+            }))
+        os.replace(tmp, self.store_path)
+
+    def _wait(self):
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    # gkeepapi hands every service its auth; there is nothing to check here
+    def setAuth(self, auth):
+        pass
+
+    def changes(self, target_version=None, nodes=None, labels=None):
+        self._wait()
+        with self._lock:
+            self.calls += 1
+            since = int(target_version) if target_version else 0
+            if nodes or labels is not None:
+                self.version += 1
+                for raw in nodes or []:
+                    raw = dict(raw)
+                    raw.setdefault("serverId", f"offline.{raw['id']}")
+                    raw["baseVersion"] = str(self.version)
+                    self.nodes[raw["id"]] = [self.version, raw]
+                if labels is not None:
+                    self.labels = labels
+                    self.labels_version = self.version
+                self._save()
+
+            response = {
+                "kind": "notes#downSync",
+                "toVersion": str(self.version),
+                "truncated": False,
+                "nodes": [raw for version, raw in self.nodes.values() if version > since],
+            }
+            if not target_version or self.labels_version > since:
+                response["userInfo"] = {"labels": self.labels}
+            return response
@@ -1,71 +1,222 @@
 import sys
 import os
 import json
-import gkeepapi
-from dotenv import load_dotenv
+import hashlib
+import types
+import time
+import queue
+import threading
+import contextlib
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+import tracing
+
+# gkeepapi (via keep_state), dotenv and sqlite3 (via keep_index) are imported
+# on the paths that need them, so startup is just the stdlib; see
+# bench_startup.py for the budget.
+
+# Settings, read by configure() once .env has been loaded:
+#   STATE_DIR    saved node state, one file per account+credential (see state_path)
+#   BACKEND      "google" (default) or "offline": a local stand-in server, see keep_offline.py
+#   SYNC_WINDOW  how long the service waits after a request for others to share its sync
+STATE_DIR = BACKEND = SYNC_WINDOW = None
+MAX_WINDOW = 200
+IDLE_SECONDS = 1.0  # quiet time before the service writes a held-back snapshot
+
+
+def configure():
+    """Load backend/.env and read the settings; later calls do nothing."""
+    global STATE_DIR, BACKEND, SYNC_WINDOW
+    if STATE_DIR is not None:
+        return
+    with tracing.span("imports"):
+        from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+    STATE_DIR = os.getenv('KEEP_STATE_DIR') or os.path.join(os.path.dirname(__file__), '.keep_state')
+    BACKEND = os.getenv('KEEP_BACKEND', 'google')
+    SYNC_WINDOW = float(os.getenv('KEEP_SYNC_WINDOW_MS') or 10) / 1000
+
+
+@contextlib.contextmanager
+def account_lock():
+    """
+    Exclusive lock on STATE_DIR, held around every sync. One-shot runs and
+    the service then take turns on the account (and on its state snapshot)
+    instead of syncing over each other.
+    """
+    configure()
+    os.makedirs(STATE_DIR, exist_ok=True)
+    with open(os.path.join(STATE_DIR, "sync.lock"), "a+") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class KeepLoginError(Exception):
+    """Login failed; the message is meant for the user."""
+
+
+def state_path(email, secret):
+    # A new token or another account hashes to a different file, so a
+    # snapshot is never restored under credentials it wasn't taken with
+    digest = hashlib.sha256(f"{email}\0{secret}".encode()).hexdigest()[:32]
+    return os.path.join(STATE_DIR, f"{digest}.json")
+
+
+def load_state(path):
+    try:
+        with open(path) as f:
+            return json.load(f)["state"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
 
-# Load .env from backend directory
-load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
 def get_keep():
+    try:
+        with tracing.span("auth"):
+            return connect()
+    except KeepLoginError as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+
+
+def connect_offline():
+    from keep_offline import OfflineKeepAPI
+    from keep_state import PersistentKeep
+
+    store = os.getenv('KEEP_OFFLINE_STORE')
+    api = OfflineKeepAPI(
+        store,
+        float(os.getenv('KEEP_OFFLINE_LATENCY_MS') or 0),
+        float(os.getenv('KEEP_OFFLINE_JITTER_MS') or 0),
+    )
+    path = state_path("offline", os.path.abspath(store) if store else "memory")
+    keep = PersistentKeep("offline", path)
+    keep._keep_api = api
+    # an in-memory server starts empty, so an old snapshot would not match it
+    keep.load(None, load_state(path) if store else None)
+    return keep
+
+
+def connect():
+    configure()
+    with tracing.span("imports"):
+        import gkeepapi
+        from keep_state import PersistentKeep
+
+    if BACKEND == 'offline':
+        return connect_offline()
+
     email = os.getenv('KEEP_EMAIL') or os.getenv('HOST_EMAIL')
     password = os.getenv('KEEP_PASSWORD') or os.getenv('HOST_PASSWORD')
     master_token = os.getenv('KEEP_MASTER_TOKEN')
 
     if not email:
-        print(json.dumps({"error": "Missing KEEP_EMAIL in .env"}))
-        sys.exit(1)
+        raise KeepLoginError("Missing KEEP_EMAIL in .env")
     
     if not master_token and not password:
-        print(json.dumps({"error": "Missing KEEP_MASTER_TOKEN or KEEP_PASSWORD in .env. Run 'python Python/get_master_token.py' to generate a master token."}))
-        sys.exit(1)
+        raise KeepLoginError("Missing KEEP_MASTER_TOKEN or KEEP_PASSWORD in .env. Run 'python Python/get_master_token.py' to generate a master token.")
 
-    keep = gkeepapi.Keep()
+    path = state_path(email, master_token or password)
+    state = load_state(path)
+    keep = PersistentKeep(email, path)
     try:
-        if master_token:
-            # Use master token - most reliable method
-            keep.authenticate(email, master_token)
-        else:
-            # Fallback to password-based login
-            keep.login(email, password)
+        try:
+            login(keep, email, password, master_token, state)
+        except (KeyError, TypeError, ValueError, gkeepapi.exception.ParseException):
+            if state is None:
+                raise
+            # unreadable snapshot (e.g. from another gkeepapi version): start clean
+            os.remove(path)
+            keep = PersistentKeep(email, path)
+            login(keep, email, password, master_token, None)
         return keep
     except gkeepapi.exception.LoginException as e:
         error_str = str(e)
         if 'NeedsBrowser' in error_str:
-            print(json.dumps({"error": "Google blocked the login. Please go to https://accounts.google.com/DisplayUnlockCaptcha, click 'Continue', and then try again immediately."}))
+            raise KeepLoginError("Google blocked the login. Please go to https://accounts.google.com/DisplayUnlockCaptcha, click 'Continue', and then try again immediately.")
         elif 'BadAuthentication' in error_str:
-             print(json.dumps({"error": "BadAuthentication: Invalid credentials. If using master token, regenerate it by running: python Python/get_master_token.py"}))
+            raise KeepLoginError("BadAuthentication: Invalid credentials. If using master token, regenerate it by running: python Python/get_master_token.py")
         else:
-            print(json.dumps({"error": f"Login failed: {error_str}"}))
-        sys.exit(1)
+            raise KeepLoginError(f"Login failed: {error_str}")
     except Exception as e:
         # Ignore the deprecation warning if it comes as an exception
         if 'deprecated' in str(e).lower() and 'authenticate' in str(e).lower():
             return keep
-        print(json.dumps({"error": f"System error: {str(e)}"}))
-        sys.exit(1)
+        raise KeepLoginError(f"System error: {str(e)}")
+
+def login(keep, email, password, master_token, state):
+    if master_token:
+        # Use master token - most reliable method
+        keep.authenticate(email, master_token, state=state)
+    else:
+        # Fallback to password-based login
+        keep.login(email, password, state=state)
+
 
-def list_notes(keep):
-    notes = keep.all()
-    result = []
+NOTE_FIELDS = {
+    "id": lambda note: note.id,
+    "title": lambda note: note.title,
+    "text": lambda note: note.text,
+    "archived": lambda note: note.archived,
+    "trashed": lambda note: note.trashed,
+    "labels": lambda note: [l.name for l in note.labels.all()],
+}
+
+def list_notes(keep, limit=None, cursor=None, fields=None, include_trashed=False, include_archived=False):
+    """
+    Yield one dict per note, projected to `fields` (all by default), and
+    return {"count", "next_cursor"} once the page is done. A cursor is the id
+    of the last note of the previous page; order is the tree's own. limit
+    is a positive page size, or None for everything (no cursor).
+    """
+    if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int) or limit <= 0):
+        # a page that can't hold a note would hand back the same cursor forever
+        raise ValueError(f"limit must be a positive integer, got {limit!r}")
+    fields = [f for f in (fields or NOTE_FIELDS) if f in NOTE_FIELDS]
+    notes = iter(keep.all())
+    if cursor:
+        for note in notes:
+            if note.id == cursor:
+                break
+        else:
+            raise ValueError(f"Unknown cursor: {cursor}")
+
+    count, last_id = 0, cursor
     for note in notes:
-        # Skip trashed/archived if you want, or include them
-        result.append({
-            "id": note.id,
-            "title": note.title,
-            "text": note.text,
-            "archived": note.archived,
-            "trashed": note.trashed,
-            "labels": [l.name for l in note.labels.all()]
-        })
-    return result
-
-def add_note(keep, title, text):
+        if (note.trashed and not include_trashed) or (note.archived and not include_archived):
+            continue
+        if limit is not None and count >= limit:
+            return {"count": count, "next_cursor": last_id}
+        yield {f: NOTE_FIELDS[f](note) for f in fields}
+        last_id = note.id
+        count += 1
+    return {"count": count, "next_cursor": None}
+
+def add_note(keep, title, text, sync=True):
     note = keep.createNote(title, text)
-    keep.sync()
+    if sync:
+        keep.sync()
     return {"id": note.id, "title": note.title, "text": note.text}
 
-def update_note(keep, note_id, title=None, text=None):
+def update_note(keep, note_id, title=None, text=None, sync=True):
     note = keep.get(note_id)
     if not note:
         return {"error": f"Note {note_id} not found"}
@@ -73,49 +224,352 @@ def update_note(keep, note_id, title=None, text=None):
         note.title = title
     if text is not None:
         note.text = text
-    keep.sync()
+    if sync:
+        keep.sync()
     return {"id": note.id, "title": note.title, "text": note.text}
 
-def archive_note(keep, note_id, archive=True):
+def archive_note(keep, note_id, archive=True, sync=True):
     note = keep.get(note_id)
     if not note:
         return {"error": f"Note {note_id} not found"}
     note.archived = archive
-    keep.sync()
+    if sync:
+        keep.sync()
     return {"id": note.id, "archived": note.archived}
 
-def delete_note(keep, note_id, delete=True):
+def delete_note(keep, note_id, delete=True, sync=True):
     note = keep.get(note_id)
     if not note:
         return {"error": f"Note {note_id} not found"}
-    note.trashed = delete
-    keep.sync()
+    # trashed is read-only on gkeepapi notes
+    if delete:
+        note.trash()
+    else:
+        note.untrash()
+    if sync:
+        keep.sync()
     return {"id": note.id, "trashed": note.trashed}
 
+def search_notes(keep, query='', label=None, archived=None, trashed=False, limit=20, offset=0):
+    return keep.note_index().search(query, label, archived, trashed, limit, offset)
+
+def batch(keep, operations, sync=True):
+    """
+    Apply a list of mutations ({"op": "add"|"update"|"archive"|"delete", ...})
+    to the local tree and push them all with a single sync. One failing item
+    doesn't stop the others; each gets its own result or error. Items are
+    checked like top-level requests, so a bad one never reaches the tree.
+    """
+    results = []
+    for item in operations:
+        op = item.get('op') if isinstance(item, dict) else None
+        if op not in MUTATIONS:
+            results.append({"op": op, "error": f"Unknown operation: {op}"})
+            continue
+        error = check_request(op, item)
+        if error:
+            results.append({"op": op, "error": error})
+            continue
+        try:
+            result = MUTATIONS[op](keep, item, False)
+        except Exception as e:
+            result = {"error": str(e)}
+        results.append({"op": op, **result})
+
+    if sync and any("error" not in r for r in results):
+        keep.sync()
+    return {
+        "results": results,
+        "applied": sum("error" not in r for r in results),
+        "failed": sum("error" in r for r in results),
+    }
+
+MUTATIONS = {
+    "add": lambda keep, p, sync=True: add_note(keep, p.get('title', ''), p.get('text', ''), sync),
+    "update": lambda keep, p, sync=True: update_note(keep, p.get('id'), p.get('title'), p.get('text'), sync),
+    "archive": lambda keep, p, sync=True: archive_note(keep, p.get('id'), p.get('archive', True), sync),
+    "delete": lambda keep, p, sync=True: delete_note(keep, p.get('id'), p.get('delete', True), sync),
+}
+
+OPERATIONS = {
+    "list": lambda keep, p: list_notes(
+        keep, p.get('limit'), p.get('cursor'), p.get('fields'),
+        p.get('include_trashed', False), p.get('include_archived', False),
+    ),
+    "search": lambda keep, p: search_notes(
+        keep, p.get('query') or '', p.get('label'), p.get('archived'),
+        p.get('trashed', False), p.get('limit') or 20, p.get('offset') or 0,
+    ),
+    "batch": lambda keep, p, sync=True: batch(keep, p.get('operations') or [], sync),
+    **MUTATIONS,
+}
+
+READ_OPERATIONS = {"list", "search"}
+WRITE_OPERATIONS = set(MUTATIONS) | {"batch"}
+
+
+def check_request(op, params):
+    """Why (op, params) can't be run as given, or None. Nothing is applied first."""
+    if op not in OPERATIONS:
+        return f"Unknown operation: {op}"
+    if params is not None and not isinstance(params, dict):
+        return "params must be an object"
+    params = params or {}
+    if op in ("update", "archive", "delete") and not isinstance(params.get('id'), str):
+        return f"{op} needs a note id"
+    if op in ("add", "update") and not all(
+        params.get(key) is None or isinstance(params.get(key), str) for key in ("title", "text")
+    ):
+        return "title and text must be strings"
+    if op == "batch" and not isinstance(params.get('operations') or [], list):
+        return "operations must be a list"
+    return None
+
+
+def run_op(keep, op, params):
+    error = check_request(op, params)
+    if error:
+        return {"error": error}
+    return OPERATIONS[op](keep, params or {})
+
+
+def drain(result, emit):
+    # Streaming ops (list) return a generator: each item goes to emit as it
+    # is produced and the generator's return value is the final result
+    if not isinstance(result, types.GeneratorType):
+        return result
+    while True:
+        try:
+            emit(next(result))
+        except StopIteration as stop:
+            return stop.value
+
+
+def is_auth_error(e):
+    import gkeepapi  # already loaded: only a connected session gets here
+
+    if isinstance(e, gkeepapi.exception.LoginException):
+        return True
+    return isinstance(e, gkeepapi.exception.APIException) and e.code == 401
+
+
+class KeepSession:
+    """
+    One authenticated Keep for the lifetime of the service, and its only
+    writer. Requests are run in windows: every write in a window is applied
+    to the local tree, one sync pushes them all and pulls remote changes,
+    and the window's reads are then answered from the fresh tree.
+
+    Access tokens are refreshed by gkeepapi itself; a full re-login only
+    happens when a window still fails with an auth error, and that window is
+    replayed once on the new session. Any other failure fails the window and
+    rolls the tree back (PersistentKeep.rollback), so its writes are neither
+    kept locally nor half-applied; requests that can't be applied are
+    answered before anything is.
+    """
+
+    def __init__(self):
+        self.keep = None
+
+    def run(self, op, params):
+        outcome = self.run_window([(op, params)])[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def run_window(self, requests):
+        """Results (or exceptions) for a list of (op, params), in order."""
+        with account_lock():
+            if self.keep is None:
+                with tracing.span("auth"):
+                    self.keep = connect()
+            try:
+                return self._run_window(requests)
+            except Exception as e:
+                if not is_auth_error(e):
+                    self.keep.rollback()
+                    raise
+                with tracing.span("auth", relogin=True):
+                    self.keep = connect()
+                try:
+                    return self._run_window(requests)
+                except Exception:
+                    self.keep.rollback()
+                    raise
+
+    def _run_window(self, requests):
+        outcomes = [None] * len(requests)
+        valid = []
+        for i, (op, params) in enumerate(requests):
+            error = check_request(op, params)
+            if error:
+                outcomes[i] = {"error": error}
+            else:
+                valid.append(i)
+
+        # a write that raises here leaves the tree half-changed: it fails
+        # the window (and rolls it back) instead of being synced
+        with tracing.span("apply"):
+            for i in valid:
+                op, params = requests[i]
+                if op in WRITE_OPERATIONS:
+                    outcomes[i] = OPERATIONS[op](self.keep, params or {}, sync=False)
+
+        # incremental both ways: pushes the window's writes, pulls only
+        # what changed remotely since the last sync
+        if valid:
+            self.keep.sync()
+
+        with tracing.span("query"):
+            for i in valid:
+                op, params = requests[i]
+                if op in READ_OPERATIONS:
+                    outcomes[i] = self._call(op, params)
+        return outcomes
+
+    def flush(self):
+        """Persist a snapshot held back by coalescing (see PersistentKeep)."""
+        if self.keep is not None:
+            with account_lock():
+                self.keep.flush()
+
+    def _call(self, op, params):
+        try:
+            return OPERATIONS[op](self.keep, params or {})
+        except Exception as e:
+            return e
+
+
+def next_window(lines, delay, idle=None):
+    """
+    Block for one request, then keep collecting for `delay` seconds. Anything
+    that queued up while the previous window was syncing is picked up too.
+    idle() runs once if nothing arrives for IDLE_SECONDS. Returns (window, eof).
+    """
+    try:
+        first = lines.get(timeout=IDLE_SECONDS if idle else None)
+    except queue.Empty:
+        idle()
+        first = lines.get()
+    if first is None:
+        return [], True
+    window, deadline = [first], time.monotonic() + delay
+    while len(window) < MAX_WINDOW:
+        try:
+            line = lines.get(timeout=max(0, deadline - time.monotonic()))
+        except queue.Empty:
+            break
+        if line is None:
+            return window, True
+        window.append(line)
+    return window, False
+
+
+# Resident mode: one JSON request per line on stdin ({"id", "op", "params"}),
+# one {"id", "result"} or {"id", "error"} line per request on stdout, after
+# any {"id", "item"} lines a streaming op produces. Login and the initial
+# full sync happen on the first request, not per call; requests that arrive
+# together (parallel tool calls) share a single sync, see KeepSession.
+# With PY_TRACE set, each window writes one trace line (see tracing.py).
+def serve(stdin=sys.stdin, stdout=sys.stdout, delay=None):
+    configure()
+    if delay is None:
+        delay = SYNC_WINDOW
+    session = KeepSession()
+    sent = 0  # response bytes, for traces
+
+    def write(message):
+        nonlocal sent
+        line = json.dumps(message) + "\n"
+        sent += len(line)
+        stdout.write(line)
+        stdout.flush()
+
+    lines = queue.Queue()
+
+    def read():
+        for line in stdin:
+            if line.strip():
+                lines.put(line)
+        lines.put(None)
+
+    threading.Thread(target=read, daemon=True).start()
+
+    eof = False
+    while not eof:
+        window, eof = next_window(lines, delay, session.flush)
+        requests = []
+        for line in window:
+            try:
+                request = json.loads(line)
+                request_id, op = request.get("id"), request.get("op")
+            except Exception as e:
+                write({"id": None, "error": str(e)})
+                continue
+            # ops name traces and are looked up in OPERATIONS: anything but
+            # a string is answered here, not left to fail the whole window
+            if not isinstance(op, str):
+                write({"id": request_id, "error": f"Invalid operation: {op!r}"})
+                continue
+            requests.append((request_id, op, request.get("params")))
+        if not requests:
+            continue
+
+        ops = [op for _, op, _ in requests]
+        with tracing.trace(
+            "keep", ops[0] if len(set(ops)) == 1 else "window",
+            ids=[request_id for request_id, _, _ in requests], ops=ops, request_bytes=sum(map(len, window)),
+        ) as trace:
+            try:
+                outcomes = session.run_window([(op, params) for _, op, params in requests])
+            except Exception as e:
+                outcomes = [e] * len(requests)
+
+            before = sent
+            with tracing.span("respond"):
+                for (request_id, _, _), result in zip(requests, outcomes):
+                    try:
+                        if isinstance(result, Exception):
+                            raise result
+                        result = drain(result, lambda item: write({"id": request_id, "item": item}))
+                        if isinstance(result, dict) and "error" in result:
+                            response = {"id": request_id, "error": result["error"]}
+                        else:
+                            response = {"id": request_id, "result": result}
+                    except Exception as e:
+                        response = {"id": request_id, "error": str(e)}
+                    write(response)
+            trace["response_bytes"] = sent - before
+    session.flush()
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print(json.dumps({"error": "No operation specified"}))
         sys.exit(1)
 
     op = sys.argv[1]
-    keep = get_keep()
+    if op == "--serve":
+        # keep_api.js writes UTF-8 JSON; the locale default (cp1252 on
+        # Windows) would garble non-ASCII titles and text
+        sys.stdin.reconfigure(encoding="utf-8")
+        sys.stdout.reconfigure(encoding="utf-8")
+        serve()
+        sys.exit(0)
+    if op not in OPERATIONS:
+        # answered before .env, the lock or a login are touched
+        print(json.dumps({"error": f"Unknown operation: {op}"}))
+        sys.exit(1)
 
-    try:
-        if op == "list":
-            print(json.dumps(list_notes(keep)))
-        elif op == "add":
-            params = json.loads(sys.argv[2])
-            print(json.dumps(add_note(keep, params.get('title', ''), params.get('text', ''))))
-        elif op == "update":
-            params = json.loads(sys.argv[2])
-            print(json.dumps(update_note(keep, params.get('id'), params.get('title'), params.get('text'))))
-        elif op == "archive":
-            params = json.loads(sys.argv[2])
-            print(json.dumps(archive_note(keep, params.get('id'), params.get('archive', True))))
-        elif op == "delete":
-            params = json.loads(sys.argv[2])
-            print(json.dumps(delete_note(keep, params.get('id'), params.get('delete', True))))
-        else:
-            print(json.dumps({"error": f"Unknown operation: {op}"}))
-    except Exception as e:
-        print(json.dumps({"error": str(e)}))
+    # held for the whole run, so parallel one-shot runs queue up on the
+    # account and each restores the snapshot the previous one left
+    with account_lock(), tracing.trace("keep", op):
+        keep = get_keep()
+
+        try:
+            params = json.loads(sys.argv[2]) if len(sys.argv) > 2 else {}
+            # list prints JSON Lines: one note per line, then the page trailer
+            print(json.dumps(drain(run_op(keep, op, params), lambda item: print(json.dumps(item), flush=True))))
+        except Exception as e:
+            print(json.dumps({"error": str(e)}))
+        keep.flush()  # a snapshot coalesced after login's sync
@@ -0,0 +1,130 @@
+import os, json, time
+import gkeepapi
+import tracing
+
+# The Keep client keep_ops.py talks to, with its node state persisted next
+# to the account's search index. Kept out of keep_ops.py so gkeepapi (and
+# everything it pulls in) is only imported once a request needs the
+# account; a bad command line or an unknown op never pays for it.
+#
+#   KEEP_SNAPSHOT_SEC   at most one snapshot write per this many seconds
+#                       (default 5); later syncs are written by flush()
+
+SNAPSHOT_INTERVAL = float(os.getenv("KEEP_SNAPSHOT_SEC") or 5)
+
+
+class ResyncDroppedWrites(Exception):
+    """The server forced a full resync while local writes were being pushed."""
+
+
+class PersistentKeep(gkeepapi.Keep):
+    """
+    Keep that persists its node state to disk after syncs. Restored
+    through authenticate(state=...), the next process only asks the server
+    for changes since the saved keep_version instead of the whole account.
+    A snapshot is O(notes) to write, so they are coalesced: the first sync
+    after a quiet SNAPSHOT_INTERVAL writes one, the rest wait for flush().
+    """
+
+    def __init__(self, email, path):
+        super().__init__()
+        self.email = email
+        self.state_path = path
+        self.state_dir = os.path.dirname(path)
+        self.index_path = os.path.splitext(path)[0] + ".index.sqlite"
+        self._saved_version = None
+        self._saved_at = float("-inf")
+        self._sent = []
+        self._index = None
+
+    def note_index(self):
+        """Search index for this account, brought up to date with the tree."""
+        if self._index is None:
+            from keep_index import NoteIndex  # sqlite3 only for accounts that search
+
+            os.makedirs(self.state_dir, exist_ok=True)
+            self._index = NoteIndex(self.index_path)
+        with tracing.span("index"):
+            self._index.refresh(self, self._keep_version)
+        return self._index
+
+    def _findDirtyNodes(self):
+        # what the sync in progress is pushing, for the resync case below
+        self._sent = super()._findDirtyNodes()
+        return self._sent
+
+    def sync(self, resync=False):
+        with tracing.span("sync"):
+            self._sent = []
+            try:
+                super().sync(resync)
+            except gkeepapi.exception.ResyncRequiredException:
+                # the server no longer has history back to our version; a
+                # resync clears the tree, so writes that were on their way
+                # up are gone and have to be reported, not swallowed
+                dropped = len(self._sent)
+                super().sync(resync=True)
+                if dropped:
+                    self.save_state(force=True)
+                    raise ResyncDroppedWrites(
+                        f"Keep required a full resync; {dropped} unsynced change(s) were dropped, retry them"
+                    )
+        self.save_state()
+
+    def rollback(self):
+        """
+        Throw away local changes after a failed sync. gkeepapi marks nodes
+        clean as it serializes them for the request, so a write that never
+        reached the server would otherwise stay in the tree (and the next
+        snapshot) without ever being pushed. Back to the last snapshot, or
+        to an empty tree (next sync is a full one) without a usable one.
+        """
+        try:
+            with open(self.state_path) as f:
+                self.restore(json.load(f)["state"])
+        except (OSError, ValueError, KeyError, TypeError):
+            self._clear()
+        self._saved_version = self._keep_version
+
+    def flush(self):
+        """Write the snapshot if a coalesced sync is still only in memory."""
+        self.save_state(force=True)
+
+    def save_state(self, force=False):
+        if self._keep_version is None or self._keep_version == self._saved_version:
+            return
+        if not force and time.monotonic() - self._saved_at < SNAPSHOT_INTERVAL:
+            return
+        os.makedirs(self.state_dir, exist_ok=True)
+        tmp = f"{self.state_path}.{os.getpid()}.tmp"
+        try:
+            # notes are private: owner-only, then rename into place
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with tracing.span("snapshot") as span, os.fdopen(fd, "w") as f:
+                # dumps() runs the C encoder; json.dump() streams through the pure-Python one
+                data = json.dumps({"email": self.email, "state": self.dump()})
+                f.write(data)
+                span.set(bytes=len(data))
+            os.replace(tmp, self.state_path)
+        except OSError:
+            return  # unwritable cache dir: next start just does a full sync
+        self._saved_version = self._keep_version
+        self._saved_at = time.monotonic()
+        self._drop_stale_states()
+
+    def _drop_stale_states(self):
+        # snapshots of this account taken under an older token/password
+        for name in os.listdir(self.state_dir):
+            path = os.path.join(self.state_dir, name)
+            if path == self.state_path or not name.endswith(".json"):
+                continue
+            try:
+                with open(path) as f:
+                    stale = json.load(f).get("email") == self.email
+                if stale:
+                    os.remove(path)
+                    index = os.path.splitext(path)[0] + ".index.sqlite"
+                    if os.path.exists(index):
+                        os.remove(index)
+            except (OSError, ValueError, AttributeError):
+                continue
@@ -158,116 +158,665 @@
 
 
 
-import io, os, sys, json, base64, time, re
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase import pdfmetrics
-from reportlab.lib.styles import ParagraphStyle
-
-# Use Windows default Segoe UI Emoji font (with fallback)
+import io, os, sys, json, base64, time, re, argparse, hashlib, contextlib
+import tracing
+
+# reportlab is most of the cold start, so it is imported where rendering
+# needs it (new_doc, styles, text_paragraph): a cache hit, --cache-stats or
+# the --batch parent never load it. bench_startup.py holds the budget.
+with tracing.span("imports"):
+    from pdf_cache import PdfCache
+    from emoji_atlas import get_atlas, ATLAS_PATH
+    import fonts
+
+# Bundled DejaVu Sans; fonts are registered lazily by fonts.apply_fallback,
+# with other DejaVu cuts and seguiemj.ttf (if present) as glyph fallbacks
 __dirname = os.path.dirname(__file__)
-font_path = os.path.join(__dirname, "seguiemj.ttf")  # Make sure you have this TTF
-if os.path.exists(font_path):
-    pdfmetrics.registerFont(TTFont("SegoeEmoji", font_path))
-    default_font = "SegoeEmoji"
-else:
-    print("⚠️ seguiemj.ttf not found, using Helvetica fallback")
-    default_font = "Helvetica"
-
-# Styles
-STYLES = {
-    "title": ParagraphStyle(
-        "Title", fontName=default_font, fontSize=22, leading=28, spaceAfter=14
+default_font = fonts.default_family()
+
+# Styles, as plain specs so cache keys don't need reportlab; see styles()
+STYLE_SPECS = {
+    "title": dict(
+        name="Title", fontName=default_font, fontSize=22, leading=28, spaceAfter=14
+    ),
+    "normal": dict(
+        name="Normal", fontName=default_font, fontSize=12, leading=18, spaceAfter=8
+    ),
+    "code": dict(
+        name="Code", fontName="Courier", fontSize=9, leading=12, spaceAfter=6
+    ),
+    "h1": dict(
+        name="Heading1", fontName=default_font, fontSize=18, leading=24, spaceBefore=6, spaceAfter=10
     ),
-    "normal": ParagraphStyle(
-        "Normal", fontName=default_font, fontSize=12, leading=18, spaceAfter=8
+    "h2": dict(
+        name="Heading2", fontName=default_font, fontSize=15, leading=20, spaceBefore=4, spaceAfter=8
     ),
-    "code": ParagraphStyle(
-        "Code", fontName="Courier", fontSize=9, leading=12, spaceAfter=6
+    "h3": dict(
+        name="Heading3", fontName=default_font, fontSize=13, leading=18, spaceBefore=2, spaceAfter=6
+    ),
+    "bullet": dict(
+        name="Bullet", fontName=default_font, fontSize=12, leading=18, spaceAfter=4,
+        leftIndent=18, bulletIndent=6
     ),
 }
 
-# Markdown conversion: bold/italic
-def markdown_to_paragraph(text):
-    text = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", text)
-    text = re.sub(r"\*(.+?)\*", r"<i>\1</i>", text)
-    return text
-
-# Detect code fences and split text into blocks
-def parse_blocks(text):
+_styles = None
+
+
+def styles():
+    """ParagraphStyles built from STYLE_SPECS on first use."""
+    global _styles
+    if _styles is None:
+        from reportlab.lib.styles import ParagraphStyle
+        _styles = {key: ParagraphStyle(**spec) for key, spec in STYLE_SPECS.items()}
+    return _styles
+
+# Single-pass markdown -> reportlab markup.
+# Block structure (fences, headings, bullets, paragraphs) is decided line by
+# line; inline markup is one regex split over each block. Spans with no `*`
+# inside and none right after them come back from the regex whole; the rest go
+# through a delimiter stack where a closer pops back to the nearest opener
+# of its kind (so `*a **b** c*` nests). Every delimiter is pushed and popped
+# at most once, so unmatched `*` runs stay literal in linear time instead of
+# triggering backtracking.
+INLINE_TOKEN = re.compile(r"(`[^`]*`|\*\*[^*`]+\*\*(?!\*)|\*[^*`]+\*(?!\*)|\*\*|\*)")
+EMPHASIS = {"**": ("<b>", "</b>"), "*": ("<i>", "</i>")}
+HEADING = re.compile(r"(#{1,6})\s+(.*)")
+BULLET = re.compile(r"\s*([-*+]|\d+[.)])\s+(.*)")
+FENCE_INFO = re.compile(r"[\w+#.-]*")
+
+
+# Chained str.replace is kept on purpose: each call is a C memchr scan that
+# returns the same object when there is nothing to replace, and measured
+# ~25x faster than str.translate with multi-character replacements.
+def escape_text(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\n", "<br/>")
+
+
+def inline_markup(text):
+    # escaping never touches `*` or backticks, so it can run first, in C
+    text = escape_text(text)
+    if "*" not in text and "`" not in text:
+        return text
+
+    # split() keeps the tokens at odd indices: text, token, text, ...
+    parts = INLINE_TOKEN.split(text)
+    opens = []  # (delimiter, index in parts) still waiting for a closer
+    waiting = {"**": 0, "*": 0}  # open delimiters of each kind in `opens`
+
+    for i in range(1, len(parts), 2):
+        token = parts[i]
+        if token[0] == "`":
+            parts[i] = '<font face="Courier">' + token[1:-1].replace(" ", "&nbsp;") + "</font>"
+            continue
+        if token not in EMPHASIS:
+            # a flat **bold** / *italic* span, matched whole by the regex
+            if token[1] == "*":
+                parts[i] = "<b>" + token[2:-2] + "</b>"
+            else:
+                parts[i] = "<i>" + token[1:-1] + "</i>"
+            continue
+        if waiting[token]:
+            # delimiters opened inside the span being closed can't be closed
+            # any more (that would cross tags) and stay literal
+            while opens[-1][0] != token:
+                waiting[opens.pop()[0]] -= 1
+            start = opens[-1][1]
+            if parts[i - 1] or i - start > 2:  # `****` is not an empty span
+                opens.pop()
+                waiting[token] -= 1
+                parts[start], parts[i] = EMPHASIS[token]
+                continue
+        # stays literal unless a matching delimiter closes it later
+        opens.append((token, i))
+        waiting[token] += 1
+
+    return "".join(parts)
+
+
+def markdown_to_blocks(text):
     blocks = []
-    code_block_pattern = re.compile(r"```(.*?)```", re.DOTALL)
-
-    last_end = 0
-    for match in code_block_pattern.finditer(text):
-        if match.start() > last_end:
-            blocks.append({"type": "text", "text": text[last_end:match.start()]})
-        code_text = match.group(1).strip()
-        blocks.append({"type": "code", "text": code_text})
-        last_end = match.end()
+    para = []
+    code = None  # lines of the open fence, if any
+
+    def flush_para():
+        if para:
+            blocks.append({"type": "paragraph", "text": inline_markup("\n".join(para))})
+            para.clear()
+
+    def add_code(lines):
+        blocks.append({"type": "code", "text": "\n".join(lines).strip()})
+
+    for line in text.split("\n"):
+        if code is not None:
+            end = line.find("```")
+            if end == -1:
+                code.append(line)
+                continue
+            code.append(line[:end])
+            add_code(code)
+            code = None
+            line = line[end + 3:]
+            if not line.strip():
+                continue
+
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            flush_para()
+            body = stripped[3:]
+            end = body.find("```")
+            if end != -1:
+                add_code([body[:end]])
+                if body[end + 3:].strip():
+                    para.append(body[end + 3:].strip())
+            else:
+                # a bare word after the fence is a language tag, not code
+                code = [] if FENCE_INFO.fullmatch(body) else [body]
+            continue
+
+        if not stripped:
+            flush_para()
+            continue
+
+        heading = HEADING.match(stripped)
+        if heading:
+            flush_para()
+            level = min(len(heading.group(1)), 3)
+            blocks.append({"type": "heading", "level": level, "text": inline_markup(heading.group(2))})
+            continue
+
+        bullet = BULLET.match(line)
+        if bullet:
+            flush_para()
+            block = {"type": "bullet", "text": inline_markup(bullet.group(2))}
+            if bullet.group(1)[0].isdigit():
+                block["ordinal"] = bullet.group(1)  # "1." / "2)" is kept as written
+            blocks.append(block)
+            continue
+
+        para.append(stripped)
+
+    if code is not None:
+        add_code(code)
+    flush_para()
+    return blocks
 
-    if last_end < len(text):
-        blocks.append({"type": "text", "text": text[last_end:]})
 
+# Inline emoji become <img/> glyphs from the offline atlas (emoji_atlas.py)
+# when one has been built; otherwise the text is left as it is
+def text_paragraph(text, style, **kwargs):
+    from reportlab.platypus import Paragraph
+
+    atlas = get_atlas()
+    if atlas is not None:
+        text = atlas.markup(text, style.fontSize, _profile["emoji_px"])
+    return Paragraph(fonts.apply_fallback(text, style.fontName), style, **kwargs)
+
+
+# Content item -> blocks (parsing) and block -> flowable (construction)
+# are kept apart so bench_pdf.py can time them separately
+def item_to_blocks(item):
+    if item["type"] == "text":
+        blocks = markdown_to_blocks(item["text"])
+    elif item["type"] == "code":
+        blocks = [{"type": "code", "text": item["text"]}]
+    else:
+        return []
+    # {"line_numbers": true} on an item numbers its code blocks
+    if item.get("line_numbers"):
+        for block in blocks:
+            if block["type"] == "code":
+                block["line_numbers"] = True
     return blocks
 
 
-def generate_pdf(content):
-    # print("Generating PDF...", content)
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buffer, pagesize=A4, rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40
+def block_to_flowable(block):
+    if block["type"] == "paragraph":
+        return text_paragraph(block["text"], styles()["normal"])
+    elif block["type"] == "heading":
+        return text_paragraph(block["text"], styles()[f"h{block['level']}"])
+    elif block["type"] == "bullet":
+        return text_paragraph(block["text"], styles()["bullet"], bulletText=block.get("ordinal", "•"))
+    elif block["type"] == "code":
+        from code_block import CodeBlock  # imports reportlab, like every flowable here
+
+        return CodeBlock(block["text"], styles()["code"], block.get("line_numbers", False))
+
+
+# Flowables for a single content item, so callers can feed items one by one
+def item_to_flowables(item):
+    with tracing.span("parse", bytes=len(item.get("text") or "")):
+        blocks = item_to_blocks(item)
+    return [block_to_flowable(block) for block in blocks]
+
+
+# Rendered PDFs are cached on disk by a hash of the content plus everything
+# that affects layout. Bump RENDER_VERSION when the layout code changes.
+# PDF_CACHE_MAX_MB=0 turns the cache off.
+RENDER_VERSION = 5
+CACHE_DIR = os.getenv("PDF_CACHE_DIR") or os.path.join(__dirname, ".pdf_cache")
+CACHE_MAX_BYTES = int(float(os.getenv("PDF_CACHE_MAX_MB", "200")) * 1024 * 1024)
+PDF_CACHE = PdfCache(CACHE_DIR, CACHE_MAX_BYTES) if CACHE_MAX_BYTES > 0 else None
+
+
+def style_fingerprint():
+    return [
+        (name, s["fontName"], s["fontSize"], s["leading"],
+         s.get("spaceBefore", 0), s.get("spaceAfter", 0), s.get("leftIndent", 0))
+        for name, s in sorted(STYLE_SPECS.items())
+    ]
+
+
+def atlas_fingerprint():
+    try:
+        st = os.stat(ATLAS_PATH)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def cache_key(content, profile="default"):
+    h = hashlib.sha256()
+    config = {
+        "version": RENDER_VERSION,
+        "profile": PROFILES[profile],
+        "font": default_font,
+        "fallback_fonts": [name for name in fonts.FALLBACK_CHAIN if fonts.available(name)],
+        "styles": style_fingerprint(),
+        "emoji_atlas": atlas_fingerprint(),
+    }
+    h.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+    h.update(json.dumps(content, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return h.hexdigest()
+
+
+def write_bytes(fileobj, data):
+    if isinstance(fileobj, (str, os.PathLike)):
+        with open(fileobj, "wb") as f:
+            f.write(data)
+    else:
+        fileobj.write(data)
+
+
+# Build the PDF straight into a writable binary file object (or a path),
+# without the base64 round trip that generate_pdf does for data URIs.
+# content can be any iterable of items, e.g. read_content_items(stream);
+# only lists go through the cache, since a stream can't be hashed up front.
+# stream=True also skips the cache so nothing is buffered besides reportlab's
+# own page objects; with a lazy content iterable memory stays bounded.
+def generate_pdf_to(content, fileobj, stream=False, profile=None):
+    profile = profile or PROFILE
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown PDF profile: {profile}")
+    if stream or PDF_CACHE is None or not isinstance(content, list):
+        build_pdf(content, fileobj, profile)
+        return
+
+    with tracing.span("cache") as span:
+        key = cache_key(content, profile)
+        data = PDF_CACHE.get(key)
+        span.set(hit=data is not None)
+    if data is None:
+        buffer = io.BytesIO()
+        build_pdf(content, buffer, profile)
+        data = buffer.getvalue()
+        PDF_CACHE.put(key, data)
+    write_bytes(fileobj, data)
+
+
+class FlowableStream(list):
+    """
+    The list doc.build consumes, filled from a generator a window at a time.
+
+    reportlab only ever looks at the head of the list (len, [0], [i] while
+    gathering keepWithNext runs) and deletes flowables once they are laid
+    out, so topping the window up on those reads means content items are
+    parsed and turned into flowables just before layout needs them, and
+    dropped right after.
+    """
+
+    def __init__(self, source, window=64):
+        super().__init__()
+        self._source = iter(source)
+        self._window = window
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self._window:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+def iter_flowables(content):
+    yield text_paragraph("Agent Generated PDF", styles()["title"])
+    for item in content:
+        yield from item_to_flowables(item)
+
+
+def new_doc(fileobj):
+    with tracing.span("imports"):  # only the first render actually loads them
+        from reportlab.platypus import SimpleDocTemplate
+        from reportlab.lib.pagesizes import A4
+
+    return SimpleDocTemplate(
+        fileobj, pagesize=A4, rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40
     )
-    flow = []
 
-    flow.append(Paragraph("Agent Generated PDF", STYLES["title"]))
 
-    for item in content:
-        if item["type"] == "text":
-            for block in parse_blocks(item["text"]):
-                if block["type"] == "text":
-                    # Split paragraphs by double newline
-                    paragraphs = block["text"].split("\n\n")
-                    for para in paragraphs:
-                        if para.strip():
-                            # Replace single line breaks with <br/>
-                            formatted = markdown_to_paragraph(
-                                para.strip().replace("\n", "<br/>")
-                            )
-                            flow.append(Paragraph(formatted, STYLES["normal"]))
-                elif block["type"] == "code":
-                    code_html = (
-                        block["text"]
-                        .replace("&", "&amp;")
-                        .replace("<", "&lt;")
-                        .replace(">", "&gt;")
-                        .replace(" ", "&nbsp;")
-                        .replace("\n", "<br/>")
-                    )
-                    flow.append(Paragraph(code_html, STYLES["code"]))
+# Output profiles. "default" is what reportlab writes out of the box;
+# "compact" is for documents that travel as base64 data URIs:
+#   - lean font subsets (fonts.slim_subsets): no hinting and a name table
+#     without DejaVu's license text; the bulk of a text-only document is
+#     its embedded fonts, so this is most of the saving
+#   - binary page streams: reportlab wraps each page's content stream in
+#     ASCII85, a quarter bigger (font subsets are binary either way)
+#   - emoji drawn from downscaled glyphs, EMOJI_PX instead of the atlas' 72px
+# Both profiles already get Flate-compressed streams and TTFs embedded as
+# subsets of the glyphs actually used (reportlab does both by default),
+# and each distinct emoji image is stored once per document (emoji_atlas.py).
+# PDF_PROFILE sets the profile for jobs that don't name one.
+PROFILES = {
+    "default": {"ascii85": True, "slim_fonts": False, "emoji_px": None},
+    "compact": {"ascii85": False, "slim_fonts": True, "emoji_px": 32},
+}
+PROFILE = os.getenv("PDF_PROFILE") or "default"
+_profile = PROFILES["default"]
 
-        elif item["type"] == "code":
-            code_html = (
-                item["text"]
-                .replace("&", "&amp;")
-                .replace("<", "&lt;")
-                .replace(">", "&gt;")
-                .replace(" ", "&nbsp;")
-                .replace("\n", "<br/>")
-            )
-            flow.append(Paragraph(code_html, STYLES["code"]))
 
-    doc.build(flow)
-    buffer.seek(0)
-    return base64.b64encode(buffer.read()).decode("utf-8")
+@contextlib.contextmanager
+def output_profile(name):
+    # rl_config is read while the document is written, so the switch only
+    # has to hold for the build
+    global _profile
+    from reportlab import rl_config
 
+    previous, previous_a85 = _profile, rl_config.useA85
+    _profile = PROFILES[name]
+    rl_config.useA85 = int(_profile["ascii85"])
+    try:
+        with fonts.slim_subsets() if _profile["slim_fonts"] else contextlib.nullcontext():
+            yield
+    finally:
+        _profile, rl_config.useA85 = previous, previous_a85
 
-if __name__ == "__main__":
-    data = json.loads(sys.argv[1]) if len(sys.argv) > 1 else []
-    pdf_base64 = generate_pdf(data)
-    result = {
-        "pdf_uri": f"data:application/pdf;base64,{pdf_base64}",
-        "name": f"{pdf_int(time.time())}.pdf",
+
+def build_pdf(content, fileobj, profile="default"):
+    with tracing.span("build") as span, output_profile(profile):
+        new_doc(fileobj).build(FlowableStream(iter_flowables(content)))
+        # pipes (--out -) can't tell(); a path (str) has nothing to ask
+        if tracing.ENABLED and hasattr(fileobj, "seekable") and fileobj.seekable():
+            span.set(bytes=fileobj.tell())
+
+
+# JSON Lines input: one content item per line, parsed lazily so the raw
+# document never has to sit in memory (or in argv) as a single string
+def read_content_items(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def generate_pdf(content, profile=None):
+    buffer = io.BytesIO()
+    generate_pdf_to(content, buffer, profile=profile)
+    with tracing.span("encode", bytes=buffer.tell()):
+        return base64.b64encode(buffer.getbuffer()).decode("utf-8")
+
+
+def pdf_name():
+    return f"agent_pdf_{int(time.time())}.pdf"
+
+
+def render_job(content, out=None, stream=False, profile=None, report_savings=False):
+    if stream and not out:
+        # a data URI has to be whole before it's encoded; nothing to stream into
+        raise ValueError("stream needs out: a path the PDF is built straight into")
+    if out:
+        generate_pdf_to(content, out, stream, profile)
+        result = {"path": out, "name": pdf_name(), "size": os.path.getsize(out)}
+    else:
+        pdf_base64 = generate_pdf(content, profile)
+        result = {
+            "pdf_uri": f"data:application/pdf;base64,{pdf_base64}",
+            "name": pdf_name(),
+        }
+    if report_savings:
+        size = result["size"] if out else len(base64.b64decode(pdf_base64))
+        result["savings"] = profile_savings(content, size, profile or PROFILE)
+    return result
+
+
+# What a profile saved against "default" for the same content. The default
+# rendering goes through the cache like any other, but on a miss it is a
+# second build, so callers ask for it (report_savings / --report-savings).
+# For "compact" expect roughly 40-55% on text (bench_pdf.py's corpora),
+# nearly all of it from the leaner font subsets.
+def profile_savings(content, size, profile):
+    buffer = io.BytesIO()
+    generate_pdf_to(content, buffer, profile="default")
+    default_size = buffer.tell()
+    return {
+        "profile": profile,
+        "size": size,
+        "default_size": default_size,
+        "saved_bytes": default_size - size,
+        "saved_pct": round(100 * (default_size - size) / default_size, 1) if default_size else 0.0,
+    }
+
+
+# Raw binary output on stdout: one JSON header line, then the PDF bytes
+# until EOF. The reader splits on the first newline; no base64 involved.
+def write_pdf_stream(content, stream, streaming=False, profile=None):
+    header = {"name": pdf_name(), "mimeType": "application/pdf"}
+    stream.write(json.dumps(header).encode("utf-8") + b"\n")
+    stream.flush()  # the reader learns the name before layout starts
+    generate_pdf_to(content, stream, streaming, profile)
+    stream.flush()
+
+
+# Long-lived worker: one JSON job per line on stdin, one {"id", "result"}
+# line per job on stdout. A job with "out" writes the PDF to that path and
+# its result is {"path", "name", "size"} instead of a data URI ("stream"
+# builds it there without the cache, and is an error without "out"); "profile"
+# picks an output profile and "report_savings" adds its size against the
+# default profile as "savings";
+# {"op": "cache_stats"} returns the render cache counters. reportlab, fonts
+# and styles are set up by the first render, so later jobs only pay for
+# layout. A bad job answers with {"id", "error"} and the loop goes on. With
+# PY_TRACE set, every job also writes its phase timings to the trace
+# channel (see tracing.py).
+def serve(stdin=sys.stdin, stdout=sys.stdout):
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        job_id = None
+        with tracing.trace("pdf", "render", request_bytes=len(line)) as trace:
+            try:
+                job = json.loads(line)
+                job_id = trace["id"] = job.get("id")
+                if job.get("op") == "cache_stats":
+                    trace["op"] = "cache_stats"
+                    result = cache_stats()
+                else:
+                    result = render_job(
+                        job.get("content", []), job.get("out"), job.get("stream", False),
+                        job.get("profile"), job.get("report_savings", False),
+                    )
+                response = {"id": job_id, "result": result}
+            except Exception as e:
+                response = {"id": job_id, "error": f"{type(e).__name__}: {e}"}
+                trace["error"] = type(e).__name__
+
+            response = json.dumps(response)
+            trace["response_bytes"] = len(response)
+            stdout.write(response + "\n")
+            stdout.flush()
+
+
+def plan_batch(lines, out_dir, profile=None):
+    """
+    (job_id, args, error) for each job line: render_batch_job's arguments,
+    or the error the job reports without being rendered. Lines are parsed
+    one at a time so a bad line fails only its own job.
+    """
+    taken = {}
+    index = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        job_id = index
+        index += 1
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise ValueError(f"job must be a JSON object, not {type(job).__name__}")
+            job_id = job.get("id", job_id)
+            # names (and ids) come from the jobs file: a file name only, so
+            # no job can write outside out_dir or over another job's file
+            name = os.path.basename(str(job.get("name") or f"{job_id}.pdf"))
+            if name in ("", ".", ".."):
+                raise ValueError(f"Invalid output name: {job.get('name')!r}")
+            key = os.path.normcase(name)
+            if key in taken:
+                raise ValueError(f"Output name {name!r} is already used by job {taken[key]!r}")
+            taken[key] = job_id
+        except ValueError as e:
+            yield job_id, None, f"{type(e).__name__}: {e}"
+            continue
+        path = os.path.join(out_dir, name)
+        yield job_id, (job_id, job.get("content", []), path, job.get("profile") or profile), None
+
+
+def render_batch_job(job_id, content, path, profile=None):
+    start = time.perf_counter()
+    try:
+        with tracing.trace("pdf", "batch", job_id):
+            generate_pdf_to(content, path, profile=profile)
+    except Exception as e:
+        return {"id": job_id, "error": f"{type(e).__name__}: {e}", "seconds": time.perf_counter() - start}
+    return {"id": job_id, "path": path, "size": os.path.getsize(path), "seconds": time.perf_counter() - start}
+
+
+# Batch mode: render every job in a JSON Lines file into out_dir across a
+# process pool. Pool processes import this module (fonts, styles) once and
+# reuse it for all their jobs. One result line per document is printed as
+# it finishes, then a summary; a failing document (or a malformed line, or
+# a pool process that dies) never stops the run.
+def run_batch(jobs_path, out_dir, workers=None, profile=None):
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(jobs_path, encoding="utf-8") as f:
+        jobs = list(plan_batch(f, out_dir, profile))
+
+    start = time.perf_counter()
+    failed = 0
+
+    def emit(result):
+        nonlocal failed
+        failed += "error" in result
+        print(json.dumps(result), flush=True)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for job_id, args, error in jobs:
+            if error:
+                emit({"id": job_id, "error": error, "seconds": 0.0})
+                continue
+            try:
+                futures[pool.submit(render_batch_job, *args)] = job_id
+            except Exception as e:  # BrokenProcessPool once a pool process has died
+                emit({"id": job_id, "error": f"{type(e).__name__}: {e}", "seconds": 0.0})
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:  # BrokenProcessPool: the process died mid-job
+                result = {"id": futures[future], "error": f"{type(e).__name__}: {e}", "seconds": None}
+            emit(result)
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "documents": len(jobs),
+        "failed": failed,
+        "seconds": elapsed,
+        "docs_per_second": len(jobs) / elapsed if elapsed else None,
     }
-    print(json.dumps(result))
+    print(json.dumps({"summary": summary}), flush=True)
+    return failed
+
+
+def cache_stats():
+    if PDF_CACHE is None:
+        return {"enabled": False}
+    return {"enabled": True, **PDF_CACHE.stats()}
+
+
+def render(content, out=None, stream=False, profile=None, report_savings=False):
+    with tracing.trace("pdf", "render"):
+        if out == "-":
+            write_pdf_stream(content, sys.stdout.buffer, stream, profile)
+        else:
+            print(json.dumps(render_job(content, out, stream, profile, report_savings)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render agent content to PDF")
+    parser.add_argument("content", nargs="?", default="[]", help="JSON array of content items")
+    parser.add_argument("--serve", action="store_true", help="run as a long-lived worker reading JSON jobs from stdin")
+    parser.add_argument("--input", help="read content items as JSON Lines from this path ('-' for stdin)")
+    parser.add_argument("--cache-stats", action="store_true", help="print render cache hits/misses/evictions and exit")
+    parser.add_argument("--batch", help="JSON Lines file of {id, name?, content} jobs to render in parallel into --out DIR")
+    parser.add_argument("--workers", type=int, help="process pool size for --batch (default: CPU count)")
+    parser.add_argument("--stream", action="store_true", help="skip the render cache and build straight into --out; with --input, items are read as layout reaches them")
+    parser.add_argument("--out", help="write raw PDF bytes to this path ('-' for stdout) instead of a base64 data URI")
+    parser.add_argument("--profile", choices=sorted(PROFILES), help="output profile (default: PDF_PROFILE or 'default'); 'compact' for the smallest file")
+    parser.add_argument("--report-savings", action="store_true", help="add the size saved against the default profile to the result (renders the default too)")
+    args = parser.parse_args(argv)
+    if args.stream and not args.out and not args.serve:
+        parser.error("--stream needs --out PATH (or '-' for stdout)")
+    if args.report_savings and (args.out == "-" or args.stream):
+        parser.error("--report-savings needs a JSON result and a cacheable render (no --out -, no --stream)")
+
+    if args.serve or args.input == "-":
+        # callers write UTF-8 JSON; the locale default (cp1252 on Windows)
+        # would turn any non-ASCII text into mojibake
+        sys.stdin.reconfigure(encoding="utf-8")
+        sys.stdout.reconfigure(encoding="utf-8")
+    if args.serve:
+        serve()
+        return
+    if args.batch:
+        if not args.out or args.out == "-":
+            parser.error("--batch needs --out DIR")
+        sys.exit(1 if run_batch(args.batch, args.out, args.workers, args.profile) else 0)
+    if args.cache_stats:
+        print(json.dumps(cache_stats()))
+        return
+
+    options = (args.out, args.stream, args.profile, args.report_savings)
+    if args.input == "-":
+        items = read_content_items(sys.stdin)
+        render(list(items) if args.report_savings else items, *options)
+    elif args.input:
+        with open(args.input, encoding="utf-8") as f:
+            items = read_content_items(f)
+            render(list(items) if args.report_savings else items, *options)
+    else:
+        render(json.loads(args.content), *options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import os, json, time
+
+# On-disk LRU of rendered PDFs, one "<key>.pdf" file per entry.
+# Recency is the file mtime (bumped on every hit), so several pdf.py
+# processes can share one directory without a separate index file.
+# Hit/miss/eviction counters live in stats.json next to the entries.
+
+
+class PdfCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        # write-then-rename so a concurrent reader never sees half a PDF
+        tmp = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(key))
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".pdf"):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue  # evicted by another process meanwhile
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        self._count("evictions", evicted)
+
+    def _read_stats(self):
+        try:
+            with open(os.path.join(self.directory, "stats.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _count(self, field, n=1):
+        stats = self._read_stats()
+        stats[field] = stats.get(field, 0) + n
+        stats["updated"] = int(time.time())
+        tmp = os.path.join(self.directory, f"stats.json.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(stats, f)
+        os.replace(tmp, os.path.join(self.directory, "stats.json"))
+
+    def stats(self):
+        entries = self._entries()
+        stats = self._read_stats()
+        stats.update({
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        })
+        return stats
@@ -0,0 +1,162 @@
+import os, json, time, hashlib, functools
+
+# Encrypted login sessions for the BrowserPool tasks that sign in
+# (Moodle.py, godaddy.py).
+#
+# After a successful login the task saves its context's storage state
+# (cookies + localStorage, context.storage_state()) under (site, account).
+# The next run for that account opens its context with that state, checks
+# a page only a signed-in user sees, and goes through the login form only
+# when the session has expired.
+#
+# Settings, read by configure() once backend/.env has been loaded (the task
+# scripts import this module before they load it):
+#   BROWSER_SESSION_CACHE     0: always log in from scratch (default 1)
+#   BROWSER_SESSION_DIR       where sessions live (default backend/.browser_sessions)
+#   BROWSER_SESSION_KEY       passphrase for the store
+#   BROWSER_SESSION_MAX_AGE   seconds a saved session is tried (default 7 days)
+#
+# The key never sits next to the sessions: it is derived from
+# BROWSER_SESSION_KEY, or without one generated once and kept in the OS
+# keyring (the optional `keyring` package). With neither, nothing is saved
+# and every run logs in.
+#
+# Each session is one file, AES-256-GCM encrypted (pycryptodomex, which
+# gpsoauth already installs), named by a hash of site and account so the
+# directory doesn't list who is signed in. Files are owner-only. A file
+# that fails to decrypt (key changed, tampered) is dropped like an expired
+# session.
+
+__dirname = os.path.dirname(os.path.abspath(__file__))
+ENV_FILE = os.path.join(__dirname, "..", ".env")
+ENABLED = SESSION_DIR = PASSPHRASE = MAX_AGE = None
+MAGIC = b"BRSESS1"
+NONCE, TAG = 12, 16  # file: MAGIC | nonce | tag | ciphertext
+
+
+def configure():
+    """Load backend/.env and read the settings; later calls do nothing."""
+    global ENABLED, SESSION_DIR, PASSPHRASE, MAX_AGE
+    if SESSION_DIR is not None:
+        return
+    from dotenv import load_dotenv
+
+    load_dotenv(ENV_FILE)
+    ENABLED = os.getenv("BROWSER_SESSION_CACHE", "1") not in ("", "0", "false")
+    PASSPHRASE = os.getenv("BROWSER_SESSION_KEY")
+    MAX_AGE = float(os.getenv("BROWSER_SESSION_MAX_AGE") or 7 * 24 * 3600)
+    SESSION_DIR = os.getenv("BROWSER_SESSION_DIR") or os.path.join(__dirname, "..", ".browser_sessions")
+
+
+def _write_private(path, data):
+    os.makedirs(SESSION_DIR, mode=0o700, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+@functools.lru_cache(maxsize=1)
+def _key():
+    """The store's AES key, or None when there is nowhere safe to keep one."""
+    configure()
+    if PASSPHRASE:
+        # the salt only has to be fixed per store; scrypt makes guessing slow
+        return hashlib.scrypt(PASSPHRASE.encode(), salt=b"browser-sessions", n=2 ** 14, r=8, p=1, dklen=32)
+    try:
+        import keyring
+    except ImportError:
+        return None
+    try:
+        stored = keyring.get_password("browser-sessions", "key")
+        if stored is None:
+            stored = os.urandom(32).hex()
+            keyring.set_password("browser-sessions", "key", stored)
+        return bytes.fromhex(stored)
+    except Exception:  # no usable keyring backend (headless Linux, ...)
+        return None
+
+
+def _path(site, account):
+    configure()
+    name = hashlib.sha256(f"{site}\0{account}".encode()).hexdigest()[:32]
+    return os.path.join(SESSION_DIR, f"{name}.session")
+
+
+def load(site, account):
+    """Saved storage state for (site, account), or None (none, expired, unreadable)."""
+    configure()
+    if not ENABLED or not account or _key() is None:
+        return None
+    from Cryptodome.Cipher import AES
+
+    path = _path(site, account)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("not a session file")
+        body = data[len(MAGIC):]
+        nonce, tag, ciphertext = body[:NONCE], body[NONCE:NONCE + TAG], body[NONCE + TAG:]
+        cipher = AES.new(_key(), AES.MODE_GCM, nonce=nonce)
+        cipher.update(f"{site}\0{account}".encode())
+        saved = json.loads(cipher.decrypt_and_verify(ciphertext, tag))
+        saved_at, state = saved.get("saved_at"), saved.get("state")
+        if not isinstance(saved_at, (int, float)) or not isinstance(state, dict):
+            raise ValueError("incomplete session")
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, AttributeError):
+        delete(site, account)
+        return None
+    if time.time() - saved_at > MAX_AGE:
+        delete(site, account)
+        return None
+    return state
+
+
+def save(site, account, state):
+    configure()
+    if not ENABLED or not account or _key() is None:
+        return
+    from Cryptodome.Cipher import AES
+
+    plaintext = json.dumps({"saved_at": time.time(), "state": state}).encode()
+    try:
+        cipher = AES.new(_key(), AES.MODE_GCM, nonce=os.urandom(NONCE))
+        cipher.update(f"{site}\0{account}".encode())
+        ciphertext, tag = cipher.encrypt_and_digest(plaintext)
+        _write_private(_path(site, account), MAGIC + cipher.nonce + tag + ciphertext)
+    except OSError:
+        pass  # unwritable store: the next run just logs in again
+
+
+def delete(site, account):
+    try:
+        os.remove(_path(site, account))
+    except OSError:
+        pass
+
+
+# BrowserPool.context(session=(site, account)) opens the context with the
+# saved state and tags it with context.session / context.session_restored;
+# tasks report back through the context they were given.
+
+def restored(context):
+    """True when the context started from a saved session."""
+    return getattr(context, "session_restored", False)
+
+
+async def remember(context):
+    """Save the context's cookies and storage after a successful login."""
+    session = getattr(context, "session", None)
+    if session:
+        save(*session, await context.storage_state())
+
+
+def forget(context):
+    """Drop the saved session behind a context whose login didn't hold."""
+    session = getattr(context, "session", None)
+    if session:
+        delete(*session)
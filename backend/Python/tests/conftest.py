@@ -0,0 +1,4 @@
+import os, sys
+
+# the helpers are flat scripts, imported by name like they import each other
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,26 @@
+import os
+
+import pdf
+
+
+def plan(*lines):
+    return list(pdf.plan_batch(lines, "out"))
+
+
+def test_jobs_are_planned_into_out_dir():
+    (job,) = plan('{"id": "a", "name": "../../a.pdf", "content": [1]}')
+    assert job == ("a", ("a", [1], os.path.join("out", "a.pdf"), None), None)
+
+
+def test_bad_lines_fail_only_their_own_job():
+    jobs = plan('["a"]', "{not json", "", '{"id": "ok"}', '{"name": ".."}')
+    assert [(job_id, args is None) for job_id, args, _ in jobs] == [(0, True), (1, True), ("ok", False), (3, True)]
+    assert jobs[0][2].startswith("ValueError: job must be a JSON object")
+    assert jobs[1][2].startswith("JSONDecodeError")
+
+
+def test_colliding_names_are_reported():
+    jobs = plan('{"id": "a"}', '{"id": "b", "name": "sub/a.pdf"}')
+    assert jobs[0][2] is None
+    assert jobs[1][:2] == ("b", None)
+    assert "already used by job 'a'" in jobs[1][2]
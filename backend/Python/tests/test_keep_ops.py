@@ -0,0 +1,15 @@
+import keep_ops
+
+
+def test_batch_items_are_checked_like_requests():
+    # nothing valid, so the Keep client (and a sync) is never touched
+    result = keep_ops.batch(None, [
+        {"op": "add", "title": 5, "text": "x"},
+        {"op": "update", "title": "no id"},
+        {"op": "delete", "id": ["not", "a", "string"]},
+    ])
+    assert [r["error"] for r in result["results"]] == [
+        "title and text must be strings", "update needs a note id", "delete needs a note id",
+    ]
+    assert (result["applied"], result["failed"]) == (0, 3)
+
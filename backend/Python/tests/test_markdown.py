@@ -0,0 +1,44 @@
+import pdf
+
+
+def paragraph(text):
+    (block,) = pdf.markdown_to_blocks(text)
+    return block["text"]
+
+
+def test_flat_emphasis():
+    assert paragraph("**bold** and *italic*") == "<b>bold</b> and <i>italic</i>"
+
+
+def test_bold_inside_italic():
+    assert paragraph("*a **b** c*") == "<i>a <b>b</b> c</i>"
+
+
+def test_italic_inside_bold():
+    assert paragraph("**a *b* c**") == "<b>a <i>b</i> c</b>"
+
+
+def test_crossed_delimiters_stay_literal():
+    assert paragraph("*a **b* c**") == "<i>a **b</i> c**"
+
+
+def test_unmatched_stars_stay_literal():
+    assert paragraph("2 * 3 ****") == "2 * 3 ****"
+
+
+def test_code_span_is_not_emphasis():
+    assert paragraph("`*x*` *y*") == '<font face="Courier">*x*</font> <i>y</i>'
+
+
+def test_ordered_list_keeps_ordinals():
+    blocks = pdf.markdown_to_blocks("1. one\n2) two\n- three")
+    assert [(b["type"], b.get("ordinal"), b["text"]) for b in blocks] == [
+        ("bullet", "1.", "one"),
+        ("bullet", "2)", "two"),
+        ("bullet", None, "three"),
+    ]
+
+
+def test_ordinal_is_the_bullet_text():
+    (block,) = pdf.markdown_to_blocks("3. third")
+    assert pdf.block_to_flowable(block).bulletText == "3."
@@ -0,0 +1,28 @@
+import io
+
+import pytest
+
+pytest.importorskip("reportlab")
+
+import pdf
+
+NOTE = [{"type": "text", "text": "# Plan\n\nShip the **compact** profile, then *measure* it.\n\n- one\n- two"}]
+
+
+def build(profile):
+    buffer = io.BytesIO()
+    pdf.build_pdf(NOTE, buffer, profile)
+    return buffer.getvalue()
+
+
+def test_compact_is_much_smaller():
+    default, compact = build("default"), build("compact")
+    assert len(compact) < 0.7 * len(default)
+
+
+def test_compact_only_applies_inside_the_build():
+    before = build("default")
+    build("compact")
+    after = build("default")
+    assert len(after) == len(before)
+    assert b"/ASCII85Decode" in after
@@ -0,0 +1,48 @@
+import os, sys
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("Cryptodome")
+
+import session_cache
+
+SETTINGS = ("BROWSER_SESSION_CACHE", "BROWSER_SESSION_DIR", "BROWSER_SESSION_KEY", "BROWSER_SESSION_MAX_AGE")
+
+
+@pytest.fixture
+def env_file(tmp_path, monkeypatch):
+    """A backend/.env stand-in; the settings are unset in the process environment."""
+    for name in SETTINGS:
+        monkeypatch.delenv(name, raising=False)
+    path = tmp_path / ".env"
+    monkeypatch.setattr(session_cache, "ENV_FILE", str(path))
+    monkeypatch.setattr(session_cache, "SESSION_DIR", None)
+    session_cache._key.cache_clear()
+    yield path
+    for name in SETTINGS:  # set by load_dotenv, behind monkeypatch's back
+        os.environ.pop(name, None)
+    session_cache._key.cache_clear()
+
+
+def test_key_from_env_file(env_file, tmp_path):
+    store = tmp_path / "sessions"
+    env_file.write_text(f"BROWSER_SESSION_KEY=from-dotenv\nBROWSER_SESSION_DIR={store}\n")
+    state = {"cookies": [{"name": "MoodleSession", "value": "abc"}], "origins": []}
+
+    session_cache.save("moodle", "student", state)
+
+    assert session_cache.PASSPHRASE == "from-dotenv"
+    assert len(list(store.iterdir())) == 1
+    assert session_cache.load("moodle", "student") == state
+
+
+def test_no_key_saves_nothing(env_file, tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "keyring", None)  # no OS keyring either
+    store = tmp_path / "sessions"
+    env_file.write_text(f"BROWSER_SESSION_DIR={store}\n")
+
+    session_cache.save("moodle", "student", {"cookies": [], "origins": []})
+
+    assert not store.exists()
+    assert session_cache.load("moodle", "student") is None
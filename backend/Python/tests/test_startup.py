@@ -0,0 +1,24 @@
+import statistics
+
+import pytest
+
+from bench_startup import BUDGET_MS, LAZY, measure
+
+# The import-time budget from bench_startup.py, enforced: each entry point
+# is imported in a fresh interpreter under -X importtime.
+
+
+@pytest.mark.parametrize("module", sorted(BUDGET_MS))
+def test_heavy_dependencies_stay_lazy(module):
+    _, _, loaded = measure(module)
+    eager = [
+        lazy for lazy in LAZY[module]
+        if any(name == lazy or name.startswith(lazy + ".") for name in loaded)
+    ]
+    assert eager == [], f"importing {module} loads {eager}"
+
+
+@pytest.mark.parametrize("module", sorted(BUDGET_MS))
+def test_import_time_within_budget(module):
+    times = [measure(module)[0] for _ in range(3)]
+    assert statistics.median(times) <= BUDGET_MS[module]
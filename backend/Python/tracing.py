@@ -0,0 +1,172 @@
+import os, sys, json, time, contextlib
+
+# Opt-in phase timing for the Python helpers, written as JSON Lines to its
+# own channel so stdout (the result protocol) and stderr (warnings) are
+# left alone.
+#
+#   PY_TRACE=fd:3              write to an inherited descriptor (pythonWorker.js
+#                              passes an extra pipe as fd 3)
+#   PY_TRACE=/tmp/pdf.trace    append to a file
+#   PY_TRACE_MEMORY=1          also record each span's Python heap peak
+#                              (tracemalloc; costs noticeably more than timing)
+#
+# Unset, span() and trace() are shared no-ops and no channel is opened.
+#
+# One line per traced unit of work (a service request, a one-shot run, or
+# process startup):
+#
+#   {"tool": "pdf", "op": "render", "id": 7, "ms": 41.2, "max_rss_kb": 61240,
+#    "spans": [{"name": "parse", "ms": 3.1, "count": 12, "bytes": 5120}, ...]}
+#
+# Spans with the same name inside one trace are merged (ms and sizes summed,
+# count kept), so a phase that runs once per item stays a single entry.
+# Spans nest: "build" includes the "parse" and "fonts" work layout triggers.
+
+TARGET = os.getenv("PY_TRACE")
+ENABLED = bool(TARGET)
+MEMORY = ENABLED and os.getenv("PY_TRACE_MEMORY") == "1"
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+if MEMORY:
+    import tracemalloc
+    tracemalloc.start()
+
+_out = None
+_trace = None      # spans of the unit being traced, by name
+_startup = {}      # spans recorded before the first trace (imports, ...)
+_heap = []         # running heap peaks of the open spans, innermost last
+
+
+def _stream():
+    global _out
+    if _out is None:
+        if TARGET.startswith("fd:"):
+            _out = os.fdopen(int(TARGET[3:]), "w", buffering=1)
+        else:
+            _out = open(TARGET, "a", buffering=1)
+    return _out
+
+
+def max_rss_kb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # bytes on macOS
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "start")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        if MEMORY:
+            if _heap:
+                _heap[-1] = max(_heap[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            _heap.append(0)
+        self.start = time.perf_counter()
+        return self
+
+    def set(self, **attrs):
+        """Attach sizes learned inside the span (e.g. output bytes)."""
+        self.attrs.update(attrs)
+
+    def __exit__(self, *exc):
+        ms = (time.perf_counter() - self.start) * 1000
+        entry = {"ms": ms, "count": 1, **self.attrs}
+        if MEMORY:
+            peak = max(_heap.pop(), tracemalloc.get_traced_memory()[1])
+            if _heap:
+                _heap[-1] = max(_heap[-1], peak)
+            entry["heap_peak_kb"] = peak // 1024
+        spans = _trace if _trace is not None else _startup
+        merged = spans.get(self.name)
+        if merged is None:
+            spans[self.name] = entry
+        else:
+            for key, value in entry.items():
+                if key == "heap_peak_kb":
+                    merged[key] = max(merged.get(key, 0), value)
+                elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                    merged[key] = merged.get(key, 0) + value
+                else:
+                    merged[key] = value
+        return False
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name, **attrs):
+    """Time a phase: `with span("parse", bytes=n) as s: ...; s.set(...)`."""
+    if not ENABLED:
+        return _NO_SPAN
+    return _Span(name, attrs)
+
+
+def _write(record, spans):
+    record["spans"] = [{"name": name, **entry} for name, entry in spans.items()]
+    record["max_rss_kb"] = max_rss_kb()
+    try:
+        _stream().write(json.dumps(record) + "\n")
+    except (OSError, ValueError):
+        pass  # a closed or missing trace channel never fails the request
+
+
+@contextlib.contextmanager
+def trace(tool, op, request_id=None, **attrs):
+    """
+    Collect the spans of one unit of work and write them as one line when
+    it ends (also when it raises). Yields a dict for fields learned along
+    the way (e.g. response size). Traces don't nest; an inner call just
+    adds its spans to the outer trace.
+    """
+    global _trace
+    if not ENABLED or _trace is not None:
+        yield {}
+        return
+    flush_startup(tool)
+    _trace = {}
+    start = time.perf_counter()
+    extra = {}
+    error = None
+    try:
+        yield extra
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        spans, _trace = _trace, None
+        record = {"tool": tool, "op": op, "id": request_id, **attrs, **extra,
+                  "ms": (time.perf_counter() - start) * 1000}
+        if error:
+            record["error"] = error
+        _write(record, spans)
+
+
+def flush_startup(tool):
+    """Write the spans recorded at import (once per process)."""
+    if not ENABLED or not _startup:
+        return
+    spans = dict(_startup)
+    _startup.clear()
+    _write({"tool": tool, "op": "startup", "id": None,
+            "ms": sum(entry["ms"] for entry in spans.values())}, spans)
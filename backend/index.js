@@ -11,6 +11,7 @@ import connectDB from "./config/db.js";
 import authRoutes from "./routes/auth.js";
 import cookieParser from "cookie-parser";
 import { callAIWithFallback } from "./callModels.js";
+import { TRACING, traceSummary } from "./utils/traceStats.js";
 
 dotenv.config();
 const app = express();
@@ -176,6 +177,13 @@ app.post("/chat", async (req, res) => {
 
 app.use("/api/auth", authRoutes);
 
+/* --------------------------- TOOL TRACES ---------------------------- */
+
+// Latency histograms of the Python tools (TOOL_TRACE=1, see utils/traceStats.js)
+if (TRACING) {
+  app.get("/debug/traces", (req, res) => res.json(traceSummary()));
+}
+
 /* ---------------------------- START SERVER ---------------------------- */
 
 const PORT = process.env.PORT || 4000;
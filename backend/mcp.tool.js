@@ -1,7 +1,7 @@
 import { twitterPost } from "./tools/twitterPost.js";
 import { email } from "./tools/email.js";
 import { editPDF, generatePdf } from "./tools/generatePdf.js";
-import { keep_add_note, keep_archive_note, keep_delete_note, keep_list_notes, keep_update_note } from "./tools/google/keep_api.js";
+import { keep_add_note, keep_archive_note, keep_batch, keep_delete_note, keep_list_notes, keep_search_notes, keep_update_note } from "./tools/google/keep_api.js";
 import { add_event, list_events, view_day } from "./tools/google/calender_api.js";
 import { check_status, commit_all, create_issue, create_pull_request, get_repo_stats, get_user_profile, list_commits, list_issues, list_pull_requests, push } from "./tools/github_tools.js";
 import { fetch_transcript, summarize_article, extract_key_points } from "./tools/contentSummarizer.js";
@@ -194,9 +194,30 @@ mcpServer.tool(
 
 mcpServer.tool(
   "keepListNotes",
-  "List notes from Google Keep",
-  {},
-  async () => keep_list_notes()
+  "List notes from Google Keep, a page at a time",
+  {
+    limit: z.number().int().min(1).optional().default(50).describe("Notes per page"),
+    cursor: z.string().optional().describe("Cursor from the previous page, to continue listing"),
+    fields: z.array(z.enum(["id", "title", "text", "labels", "archived", "trashed"])).optional()
+      .describe("Only return these fields (all by default)"),
+    include_archived: z.boolean().optional().default(false).describe("Include archived notes"),
+    include_trashed: z.boolean().optional().default(false).describe("Include trashed notes"),
+  },
+  async (options) => keep_list_notes(options)
+);
+
+mcpServer.tool(
+  "keepSearchNotes",
+  "Search Google Keep notes by title, text and labels, best matches first",
+  {
+    query: z.string().optional().describe("Words to search for; empty lists the most recently updated notes"),
+    label: z.string().optional().describe("Only notes with this label"),
+    archived: z.boolean().optional().describe("Only archived (true) or unarchived (false) notes; both if omitted"),
+    trashed: z.boolean().optional().default(false).describe("Search trashed notes instead of active ones"),
+    limit: z.number().int().min(1).max(100).optional().default(20).describe("Results per page"),
+    offset: z.number().int().min(0).optional().default(0).describe("Results to skip, for the next page"),
+  },
+  async ({ query, ...options }) => keep_search_notes(query, options)
 );
 
 mcpServer.tool(
@@ -240,6 +261,22 @@ mcpServer.tool(
   async ({ id, delete: delete_note }) => keep_delete_note(id, delete_note)
 );
 
+mcpServer.tool(
+  "keepBatch",
+  "Apply several Google Keep changes (add, update, archive, delete) at once with a single sync",
+  {
+    operations: z.array(z.object({
+      op: z.enum(["add", "update", "archive", "delete"]).describe("The change to make"),
+      id: z.string().optional().describe("The ID of the note (update, archive, delete)"),
+      title: z.string().optional().describe("Title for add or update"),
+      text: z.string().optional().describe("Text content for add or update"),
+      archive: z.boolean().optional().describe("For archive: archive (true) or unarchive (false)"),
+      delete: z.boolean().optional().describe("For delete: delete (true) or restore (false)"),
+    })).describe("Changes to apply, in order"),
+  },
+  async ({ operations }) => keep_batch(operations)
+);
+
 mcpServer.tool(
   "gitCheckStatus",
   "Check the current status of the git repository",
@@ -1,56 +1,54 @@
 import { fileURLToPath } from "url";
-import { spawn } from "child_process";
 import PDFDocument from "pdfkit";
 import path from "path";
+import { createPythonWorker } from "../utils/pythonWorker.js";
 
-export function generatePdf(content) {
-  return new Promise((resolve, reject) => {
-    const __filename = fileURLToPath(import.meta.url);
-    const __dirname = path.dirname(__filename);
-    const scriptPath = path.join(__dirname,"..", "Python", "pdf.py");
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+const scriptPath = path.join(__dirname, "..", "Python", "pdf.py");
 
-    const pyProcess = spawn("python", [scriptPath, content]);
+// One long-lived `pdf.py --serve` process renders every document, so the
+// reportlab import and font registration are paid once per server run.
+const pdfWorker = createPythonWorker(scriptPath, "PDF worker", "pdf");
 
-    let output = "";
-    let errorOutput = "";
-
-    pyProcess.stdout.on("data", (data) => (output += data.toString()));
-    pyProcess.stderr.on("data", (err) => (errorOutput += err.toString()));
+function renderInWorker(content, out) {
+  return pdfWorker.request({ op: "render", content, out });
+}
 
-    pyProcess.on("close", () => {
-      if (errorOutput) {
-        console.error("Python error:", errorOutput);
-        return reject(new Error(errorOutput));
-      }
+// Writes the raw PDF bytes to outPath (no base64 data URI in memory) and
+// resolves with { path, name, size }
+export function generatePdfToFile(content, outPath) {
+  return renderInWorker(JSON.parse(content), outPath);
+}
 
-      try {
-        const jsonData = JSON.parse(output);
-        console.log("PDF generated:", jsonData.name);
+export async function generatePdf(content) {
+  let jsonData;
+  try {
+    jsonData = await renderInWorker(JSON.parse(content));
+  } catch (err) {
+    console.error("Python error:", err.message);
+    return {
+      content: [
+        {
+          type: "text",
+          text: "❌ Failed to generate PDF",
+        },
+      ],
+    };
+  }
 
-        resolve({
-          content: [
-            {
-              type: "resource_link",
-              uri: jsonData.pdf_uri,
-              name: jsonData.name,
-              mimeType: "application/pdf",
-              description: "Generated PDF from text input",
-            },
-          ],
-        });
-      } catch (err) {
-        console.error("JSON parse error in MCP tool:", err);
-        resolve({
-          content: [
-            {
-              type: "text",
-              text: "❌ Failed to parse PDF generation output",
-            },
-          ],
-        });
-      }
-    });
-  });
+  console.log("PDF generated:", jsonData.name);
+  return {
+    content: [
+      {
+        type: "resource_link",
+        uri: jsonData.pdf_uri,
+        name: jsonData.name,
+        mimeType: "application/pdf",
+        description: "Generated PDF from text input",
+      },
+    ],
+  };
 }
 
 
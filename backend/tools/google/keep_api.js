@@ -1,80 +1,73 @@
-import { spawn } from "child_process";
 import path from "path";
 import { fileURLToPath } from "url";
+import { createPythonWorker } from "../../utils/pythonWorker.js";
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
-const SCRIPT_PATH = path.join(__dirname, "..", "Python", "keep_ops.py");
+const SCRIPT_PATH = path.join(__dirname, "..", "..", "Python", "keep_ops.py");
 
-function runKeepOp(op, params = null) {
-    return new Promise((resolve, reject) => {
-        const args = [SCRIPT_PATH, op];
-        if (params) {
-            args.push(JSON.stringify(params));
-        }
+// A single resident `keep_ops.py --serve` process holds the logged-in Keep
+// session, so calls after the first skip login and the full account sync.
+const keepWorker = createPythonWorker(SCRIPT_PATH, "Keep service", "keep");
 
-        const pyProcess = spawn("python", args);
-
-        let output = "";
-        let errorOutput = "";
-
-        pyProcess.stdout.on("data", (data) => (output += data.toString()));
-        pyProcess.stderr.on("data", (err) => (errorOutput += err.toString()));
-
-        pyProcess.on("close", (code) => {
-            // Check if stdout contains a JSON error message even if code is non-zero
-            try {
-                if (output.trim()) {
-                    const result = JSON.parse(output);
-                    if (result.error) {
-                        return resolve({
-                            content: [{ type: "text", text: `❌ ${result.error}` }]
-                        });
-                    }
-                }
-            } catch (e) {
-                // Not JSON, continue to normal error handling
-            }
+function formatNote(n) {
+    const lines = [];
+    if (n.id !== undefined) lines.push(`ID: ${n.id}`);
+    if (n.title !== undefined) lines.push(`Title: ${n.title}`);
+    if (n.text !== undefined) lines.push(`Content: ${n.text}`);
+    if (n.labels !== undefined) lines.push(`Labels: ${n.labels.join(", ")}`);
+    if (n.archived) lines.push("Archived: yes");
+    if (n.trashed) lines.push("Trashed: yes");
+    return `${lines.join("\n")}\n---`;
+}
 
-            if (code !== 0) {
-                console.error("Keep API Error:", errorOutput);
-                return resolve({
-                    content: [{ type: "text", text: `❌ Keep operation failed: ${errorOutput || "Unknown error (Check your credentials and 2-step verification status)"}` }]
-                });
-            }
+async function runKeepOp(op, params = null) {
+    // list streams its notes; each is formatted as it arrives so the raw
+    // note objects never pile up on this side
+    const noteLines = [];
+    const onItem = op === "list" ? (note) => noteLines.push(formatNote(note)) : undefined;
 
-            try {
-                const result = JSON.parse(output);
-                if (result.error) {
-                    return resolve({
-                        content: [{ type: "text", text: `❌ ${result.error}` }]
-                    });
-                }
+    let result;
+    try {
+        result = await keepWorker.request({ op, params }, onItem);
+    } catch (err) {
+        console.error("Keep API Error:", err.message);
+        return {
+            content: [{ type: "text", text: `❌ ${err.message || "Keep operation failed (Check your credentials and 2-step verification status)"}` }]
+        };
+    }
 
-                let textResponse = "";
-                if (op === "list") {
-                    textResponse = Array.isArray(result)
-                        ? result.map(n => `ID: ${n.id}\nTitle: ${n.title}\nContent: ${n.text}\nLabels: ${n.labels.join(", ")}\n---`).join("\n")
-                        : "No notes found.";
-                } else {
-                    textResponse = `✅ Operation ${op} successful.\n${JSON.stringify(result, null, 2)}`;
-                }
+    let textResponse = "";
+    if (op === "list") {
+        textResponse = noteLines.length ? noteLines.join("\n") : "No notes found.";
+        if (result.next_cursor) textResponse += `\nMore notes: use cursor ${result.next_cursor}.`;
+    } else if (op === "search") {
+        const first = (params.offset || 0) + 1;
+        textResponse = result.results.length
+            ? `${result.total} matching notes, showing ${first}-${first + result.results.length - 1}:\n` +
+              result.results.map(n => `ID: ${n.id}\nTitle: ${n.title}\nMatch: ${n.snippet}\nLabels: ${n.labels.join(", ")}${n.archived ? " (archived)" : ""}${n.trashed ? " (trashed)" : ""}\n---`).join("\n") +
+              (result.next_offset !== null ? `\nMore results: use offset ${result.next_offset}.` : "")
+            : "No matching notes.";
+    } else if (op === "batch") {
+        const lines = result.results.map((r, i) => r.error
+            ? `${i + 1}. ❌ ${r.op}: ${r.error}`
+            : `${i + 1}. ✅ ${r.op}: ${r.id}`);
+        textResponse = `Batch applied with one sync: ${result.applied} succeeded, ${result.failed} failed.\n${lines.join("\n")}`;
+    } else {
+        textResponse = `✅ Operation ${op} successful.\n${JSON.stringify(result, null, 2)}`;
+    }
 
-                resolve({
-                    content: [{ type: "text", text: textResponse }]
-                });
-            } catch (err) {
-                console.error("JSON parse error:", err, output);
-                resolve({
-                    content: [{ type: "text", text: "❌ Failed to parse response from Keep API" }]
-                });
-            }
-        });
-    });
+    return {
+        content: [{ type: "text", text: textResponse }]
+    };
 }
 
-export const keep_list_notes = () => runKeepOp("list");
+export const keep_list_notes = ({ limit, cursor, fields, include_trashed, include_archived } = {}) =>
+    runKeepOp("list", { limit, cursor, fields, include_trashed, include_archived });
 export const keep_add_note = (title, text) => runKeepOp("add", { title, text });
 export const keep_update_note = (id, title, text) => runKeepOp("update", { id, title, text });
 export const keep_archive_note = (id, archive = true) => runKeepOp("archive", { id, archive });
 export const keep_delete_note = (id, delete_note = true) => runKeepOp("delete", { id, delete: delete_note });
+export const keep_search_notes = (query, { label, archived, trashed, limit, offset } = {}) =>
+    runKeepOp("search", { query, label, archived, trashed, limit, offset });
+export const keep_batch = (operations) => runKeepOp("batch", { operations });
@@ -0,0 +1,133 @@
+import { spawn } from "child_process";
+import readline from "readline";
+import { TRACING, recordTrace, recordRoundTrip } from "./traceStats.js";
+
+// Client for a long-lived Python helper started with `--serve`.
+// Requests go to its stdin as one JSON line each ({ id, ...payload }) and
+// replies come back on stdout as { id, result } or { id, error }, matched by
+// id so several requests can be in flight at once. Streaming ops send
+// { id, item } lines before their final reply; those go to the request's
+// onItem callback as they arrive. The process is started on first use and
+// restarted on the next request if it dies.
+//
+// A request with no reply (or stream item) for PY_WORKER_TIMEOUT_MS
+// (default 120000; 0 disables) is rejected and the worker is killed, since
+// a hung worker would stall every request after it; requests in flight on
+// it fail with the exit error and the next request starts a fresh one.
+//
+// With TOOL_TRACE=1 the worker writes phase traces to an extra pipe on fd 3
+// (PY_TRACE=fd:3) and they are aggregated under `tool` in traceStats.js.
+// A PY_TRACE already set in the environment (e.g. a file path, where fd
+// passing isn't available) is left as it is.
+const TIMEOUT_MS = Number(process.env.PY_WORKER_TIMEOUT_MS ?? 120000);
+
+export function createPythonWorker(scriptPath, label, tool = label, timeoutMs = TIMEOUT_MS) {
+  let worker = null;
+  let nextId = 1;
+  const pending = new Map();
+
+  function settle(id) {
+    const request = pending.get(id);
+    if (!request) return null;
+    pending.delete(id);
+    clearTimeout(request.timer);
+    return request;
+  }
+
+  function armTimer(id, proc) {
+    const request = pending.get(id);
+    if (!request || !timeoutMs) return;
+    clearTimeout(request.timer);
+    request.timer = setTimeout(() => {
+      settle(id)?.reject(new Error(`${label} did not answer within ${timeoutMs} ms`));
+      proc.kill();
+    }, timeoutMs);
+  }
+
+  function getWorker() {
+    // never write to a worker that has exited or whose stdin broke
+    if (worker && !worker.killed && worker.exitCode === null && worker.stdin.writable) return worker;
+    if (worker) worker.kill();
+
+    const traceFd = TRACING && !process.env.PY_TRACE;
+    // requests and replies are UTF-8 JSON whatever the locale (cp1252 on Windows)
+    const env = { ...process.env, PYTHONIOENCODING: "utf-8" };
+    const proc = spawn("python", [scriptPath, "--serve"], traceFd
+      ? { stdio: ["pipe", "pipe", "pipe", "pipe"], env: { ...env, PY_TRACE: "fd:3" } }
+      : { env });
+    worker = proc;
+
+    if (traceFd) {
+      readline.createInterface({ input: proc.stdio[3] }).on("line", (line) => {
+        try {
+          recordTrace(JSON.parse(line));
+        } catch (err) {
+          console.error(`Unreadable trace from ${label}:`, line);
+        }
+      });
+    }
+
+    const lines = readline.createInterface({ input: proc.stdout });
+    lines.on("line", (line) => {
+      let message;
+      try {
+        message = JSON.parse(line);
+      } catch (err) {
+        console.error(`Unexpected output from ${label}:`, line);
+        return;
+      }
+
+      const request = pending.get(message.id);
+      if (!request) return;
+      if ("item" in message) {
+        armTimer(message.id, proc);
+        request.onItem?.(message.item);
+        return;
+      }
+      settle(message.id);
+
+      if (message.error) request.reject(new Error(message.error));
+      else request.resolve(message.result);
+    });
+
+    // Warnings are logged, not treated as request failures
+    proc.stderr.on("data", (err) => console.error(`${label}:`, err.toString()));
+
+    const failPending = (err) => {
+      if (worker === proc) worker = null;
+      for (const id of [...pending.keys()]) {
+        if (pending.get(id).proc === proc) settle(id).reject(err);
+      }
+    };
+    proc.on("error", failPending);
+    // a worker that died mid-request makes the next write fail with EPIPE
+    proc.stdin.on("error", (err) => {
+      failPending(err);
+      proc.kill();
+    });
+    proc.on("exit", () => {
+      if (worker === proc) worker = null;
+    });
+    proc.on("close", (code) => failPending(new Error(`${label} exited with code ${code}`)));
+
+    return proc;
+  }
+
+  function request(payload, onItem) {
+    const promise = new Promise((resolve, reject) => {
+      const id = nextId++;
+      const proc = getWorker();
+      pending.set(id, { resolve, reject, onItem, proc, timer: null });
+      armTimer(id, proc);
+      proc.stdin.write(JSON.stringify({ ...payload, id }) + "\n");
+    });
+    if (!TRACING) return promise;
+
+    const start = performance.now();
+    const done = () => recordRoundTrip(tool, payload.op ?? "request", performance.now() - start);
+    promise.then(done, done);
+    return promise;
+  }
+
+  return { request };
+}
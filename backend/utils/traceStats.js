@@ -0,0 +1,90 @@
+// Latency histograms built from the Python helpers' phase traces.
+// With TOOL_TRACE=1 every worker from createPythonWorker gets PY_TRACE=fd:3
+// and an extra pipe on that descriptor (see Python/tracing.py); each trace
+// line lands here. Per tool there is one histogram per op (whole request,
+// as timed inside Python), one per span name (auth, sync, parse, build,
+// ...) and one for the round trip seen from Node, which adds queueing and
+// the pipe on top of the Python time.
+export const TRACING = process.env.TOOL_TRACE === "1";
+
+// Upper bounds in ms; the last bucket takes everything above
+const BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000];
+
+const tools = new Map();
+
+function newHistogram() {
+  return { count: 0, sumMs: 0, maxMs: 0, buckets: new Array(BOUNDS_MS.length + 1).fill(0) };
+}
+
+function observe(histograms, key, ms) {
+  let h = histograms.get(key);
+  if (!h) histograms.set(key, (h = newHistogram()));
+  h.count++;
+  h.sumMs += ms;
+  h.maxMs = Math.max(h.maxMs, ms);
+  let i = 0;
+  while (i < BOUNDS_MS.length && ms > BOUNDS_MS[i]) i++;
+  h.buckets[i]++;
+}
+
+function toolStats(tool) {
+  let stats = tools.get(tool);
+  if (!stats) {
+    stats = { ops: new Map(), spans: new Map(), roundTrip: new Map(), errors: 0, maxRssKb: 0 };
+    tools.set(tool, stats);
+  }
+  return stats;
+}
+
+export function recordTrace(trace) {
+  const stats = toolStats(trace.tool);
+  observe(stats.ops, trace.op, trace.ms);
+  for (const span of trace.spans || []) observe(stats.spans, span.name, span.ms);
+  if (trace.error) stats.errors++;
+  if (trace.max_rss_kb) stats.maxRssKb = Math.max(stats.maxRssKb, trace.max_rss_kb);
+}
+
+export function recordRoundTrip(tool, op, ms) {
+  observe(toolStats(tool).roundTrip, op, ms);
+}
+
+// Percentiles are read off the buckets, so they are the bucket's upper bound
+function percentile(h, q) {
+  let seen = 0;
+  for (let i = 0; i < h.buckets.length; i++) {
+    seen += h.buckets[i];
+    if (seen >= q * h.count) return i < BOUNDS_MS.length ? Math.min(BOUNDS_MS[i], h.maxMs) : h.maxMs;
+  }
+  return h.maxMs;
+}
+
+function summarize(histograms) {
+  const out = {};
+  for (const [key, h] of histograms) {
+    out[key] = {
+      count: h.count,
+      meanMs: h.sumMs / h.count,
+      p50Ms: percentile(h, 0.5),
+      p95Ms: percentile(h, 0.95),
+      maxMs: h.maxMs,
+      buckets: Object.fromEntries(
+        h.buckets.map((n, i) => [i < BOUNDS_MS.length ? `<=${BOUNDS_MS[i]}` : `>${BOUNDS_MS.at(-1)}`, n])
+      ),
+    };
+  }
+  return out;
+}
+
+export function traceSummary() {
+  const out = {};
+  for (const [tool, stats] of tools) {
+    out[tool] = {
+      ops: summarize(stats.ops),
+      spans: summarize(stats.spans),
+      roundTrip: summarize(stats.roundTrip),
+      errors: stats.errors,
+      maxRssKb: stats.maxRssKb,
+    };
+  }
+  return out;
+}